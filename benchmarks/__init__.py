@@ -0,0 +1,22 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmarks for GKJH.
+
+Run with `python -m benchmarks` from the root of the repository. See
+`python -m benchmarks --help` for saving results and comparing them against
+saved results.
+"""
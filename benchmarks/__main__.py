@@ -0,0 +1,104 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Run the benchmarks, optionally saving or comparing against saved results.
+
+Example use:
+```
+python -m benchmarks --save baseline.json
+# make changes
+python -m benchmarks --compare baseline.json
+```
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from .suite import benchmarks, clear_caches
+
+
+def measure(func, min_time, min_repeats) -> float:
+    """
+    measure gives the quickest of repeated calls of func in seconds.
+
+    The caches of sympy and gkjh are cleared before every call so that each
+    call starts cold.
+    """
+    times = []
+    start = time.perf_counter()
+    while len(times) < min_repeats or time.perf_counter() - start < min_time:
+        clear_caches()
+        t = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="only run matching names")
+    parser.add_argument("--save", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare against this saved JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="fail if a benchmark is this many times slower than compared",
+    )
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--min-repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    slower = []
+    for name, setup in benchmarks.items():
+        if args.filter not in name:
+            continue
+        func = setup()
+        if func is None:
+            continue
+        results[name] = measure(func, args.min_time, args.min_repeats)
+
+        line = f"{name:<45} {results[name] * 1000:>12.3f} ms"
+        if name in baseline:
+            ratio = results[name] / baseline[name]
+            line += f" {baseline[name] * 1000:>12.3f} ms {ratio:>6.2f}x"
+            if ratio > args.threshold:
+                line += " SLOWER"
+                slower.append(name)
+        print(line, flush=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if slower:
+        print(
+            f"{len(slower)} benchmarks slower than {args.threshold}x", file=sys.stderr
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
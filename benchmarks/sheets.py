@@ -0,0 +1,176 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Example vals sheets for the benchmarks.
+
+rocket and wing are the sheets of tests/examples before they are resolved.
+synthetic makes sheets of any size with the same shape.
+"""
+
+import random
+
+import sympy as sp
+import sympy.physics.units as units
+
+from gkjh import subs
+
+
+def rocket() -> dict:
+    """rocket gives the unresolved vals of tests/examples/test_rocket.py."""
+    mach_exit, mach_2, m_payload, m_rocket, T_t, P_inf, mratio, m_dot = sp.symbols(
+        "mach_exit, mach_2, m_payload, m_rocket, T_t, P_inf, mratio, m_dot"
+    )
+    D_max, R, k, P_t, phi, M_1, f_thrust, g, m_fuel, payload_mf = sp.symbols(
+        "D_max, R, k, P_t, phi, M_1, f_thrust, g, m_fuel, payload_mf"
+    )
+
+    vals = {}
+
+    # Knowns/Directly Givens
+    vals[mach_exit] = 4
+    vals[mach_2] = 1
+    vals[m_payload] = 907  # kg
+    vals[g] = sp.Rational(981, 100)
+    vals[T_t] = 3839  # K
+    vals[P_inf] = 1  # atm
+    vals[R] = 924
+    vals[k] = sp.Rational(13, 10)
+    vals[phi] = 2
+    vals[payload_mf] = sp.Rational(1, 100)
+
+    A_throat, A_exit, D_hat_e, D_e, m_dot, c_p, d_exit = sp.symbols(
+        "A_throat, A_exit, D_hat_e, D_e m_dot, c_p, d_exit"
+    )
+    T_1, T_2, T_3, P_1, P_2, P_3, mach_1, d_throat = sp.symbols(
+        "T_1, T_2, T_3, P_1, P_2, P_3, mach_1, d_throat"
+    )
+
+    # Derived
+    vals[m_rocket] = m_payload * payload_mf**-1  # kg
+    vals[m_fuel] = m_rocket - m_payload  # kg
+    vals[f_thrust] = vals[m_rocket] * g
+
+    vals[c_p] = R * k / (k - 1)
+
+    # Temperatures
+    vals[T_1] = (1 / (1 + (k - 1) / 2 * mach_1**2)) * T_t
+    vals[T_2] = (1 / (1 + (k - 1) / 2 * mach_2**2)) * T_t
+    vals[T_3] = (1 / (1 + (k - 1) / 2 * mach_exit**2)) * T_t
+
+    # Pressures
+    vals[P_3] = P_inf
+    vals[P_t] = (T_3 / T_t) ** (-c_p / R) * P_3
+    vals[P_1] = (T_1 / T_t) ** (c_p / R)
+    vals[P_2] = (T_2 / T_t) ** (c_p / R)
+
+    # Mass Flow Function
+    vals[D_max] = (2 / (k + 1)) ** ((k + 1) / (2 * (k - 1)))
+    vals[D_e] = (P_3 / P_t) * sp.sqrt(T_t / T_3) * mach_exit
+    vals[D_hat_e] = D_e / D_max
+
+    # Throat area
+    vals[A_throat] = f_thrust / (
+        k * mach_exit**2 * (P_3 / P_t) * D_hat_e**-1 * (P_t * 101325)
+    )
+    vals[d_throat] = sp.sqrt(A_throat / sp.pi) * 2
+
+    # Exit area
+    A_ratio, v_exit, A_exit, rho_exit = sp.symbols("A_ratio, v_exit, A_exit, rho_exit")
+    vals[A_ratio] = D_hat_e**-1
+    vals[A_exit] = A_ratio * A_throat
+    vals[d_exit] = sp.sqrt(A_exit / sp.pi) * 2
+
+    # Mass flow rate of propellant
+    vals[m_dot] = sp.sqrt(k / R) * D_e * (P_t * 101325) * A_exit / sp.sqrt(T_t)
+
+    # Density at exit
+    vals[rho_exit] = (P_3 * 101325) / (R * T_3)
+
+    # Exit velocity
+    vals[v_exit] = m_dot / (rho_exit * A_exit)
+
+    # Specific Impulse Equations
+    impulse, specific_impulse, t_burn = sp.symbols("impulse, sp, t_burn")
+    vals[impulse] = sp.sqrt(T_3 / T_t) * mach_exit
+    vals[specific_impulse] = sp.sqrt(k * R * T_t) / g * impulse
+    vals[t_burn] = m_fuel / m_dot
+
+    return vals
+
+
+def wing() -> dict:
+    """wing gives the unresolved vals of tests/examples/test_wing.py."""
+    C_D, v, h, w, a, rho, C_L, D, LD_ratio = sp.symbols(
+        "C_D, v, h, w, a, rho, C_L, D, LD_ratio"
+    )
+
+    vals = {}
+    vals[C_D] = sp.Rational(31, 1000)
+    vals[rho] = sp.Rational(1927, 1e6)  # slug / ft^3
+    vals[v] = 115  # mph
+    vals[h] = 7000  # ft
+    vals[w] = 1500  # lbf
+    vals[a] = 157  # ft^2
+    vals[LD_ratio] = w / D
+
+    vals[D] = sp.Rational(1, 2) * rho * v**2 * a * C_D
+
+    eqn = sp.Eq(w, sp.Rational(1, 2) * rho * v**2 * a * C_L)
+
+    vals[C_L] = sp.solve(subs(eqn, vals), C_L, dict=True)[0][C_L]
+
+    return vals
+
+
+def synthetic(size: int, seed=0) -> dict:
+    """
+    synthetic gives a vals sheet of size symbols.
+
+    A tenth of the symbols are known numbers and the rest are derived from
+    earlier symbols with the kinds of operations found in rocket, such as
+    ratios, powers and square roots. Square roots are only taken of knowns
+    so that resolving the sheet does not nest radicals without bound.
+    """
+    rng = random.Random(seed)
+    syms = sp.symbols(f"s0:{size}")
+    knowns = max(size // 10, 2)
+
+    vals = {}
+    for i, s in enumerate(syms):
+        if i < knowns:
+            vals[s] = sp.Rational(rng.randint(1, 1000), rng.randint(1, 100))
+            continue
+        a, b = (syms[rng.randrange(i)] for _ in range(2))
+        k = syms[rng.randrange(knowns)]
+        kind = rng.randrange(4)
+        if kind == 0:
+            vals[s] = a / b * k
+        elif kind == 1:
+            vals[s] = sp.sqrt(k) * a
+        elif kind == 2:
+            vals[s] = (a / b) ** 2
+        else:
+            vals[s] = a - b * sp.Rational(rng.randint(1, 9), 10)
+    return vals
+
+
+def with_units(vals: dict) -> dict:
+    """with_units gives the known numbers of vals units, cycling through some."""
+    cycle = [units.m, units.s, units.kg, units.m / units.s, units.N, units.km]
+    return {
+        k: v * cycle[i % len(cycle)] if isinstance(v, (int, sp.Number)) else v
+        for i, (k, v) in enumerate(vals.items())
+    }
@@ -0,0 +1,136 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+The benchmarks run by `python -m benchmarks`.
+
+Each benchmark is a function that sets up its inputs and returns a callable
+doing the work to time.
+"""
+
+import subprocess
+import sys
+
+import sympy as sp
+import sympy.physics.units as units
+from sympy.core.cache import clear_cache
+
+import gkjh
+import gkjh.misc
+
+from . import sheets
+
+benchmarks = {}
+
+
+def benchmark(name):
+    """Register the decorated function as the benchmark name."""
+
+    def decorator(func):
+        benchmarks[name] = func
+        return func
+
+    return decorator
+
+
+def clear_caches():
+    """Clear the caches of sympy and gkjh."""
+    clear_cache()
+    gkjh.misc._cached_latex.cache_clear()
+    gkjh.misc._conversion_factor.cache_clear()
+
+
+def _sheets():
+    yield "rocket", sheets.rocket()
+    yield "wing", sheets.wing()
+    for size in (10, 100, 1000):
+        yield f"synthetic{size}", sheets.synthetic(size)
+
+
+def _stub_display():
+    gkjh.misc.display = lambda *a, **b: None
+    gkjh.misc.display_latex = lambda *a, **b: None
+
+
+@benchmark("import gkjh")
+def import_gkjh():
+    code = "import gkjh"
+    return lambda: subprocess.run([sys.executable, "-c", code], check=True)
+
+
+for _name, _vals in _sheets():
+
+    @benchmark(f"subs_vals {_name}")
+    def bench_subs_vals(vals=_vals):
+        return lambda: gkjh.subs_vals(vals)
+
+    @benchmark(f"subs_vals sequential {_name}")
+    def bench_subs_vals_sequential(vals=_vals):
+        # Substituting each value against all of vals, as subs_vals used to
+        if len(vals) > 100:
+            return None
+        return lambda: {k: gkjh.subs(v, vals) for k, v in vals.items()}
+
+    @benchmark(f"subs {_name}")
+    def bench_subs(vals=_vals):
+        resolved = gkjh.subs_vals(vals)
+        numbers = {k: v for k, v in resolved.items() if isinstance(v, sp.Number)}
+        exprs = list(vals.values())
+        return lambda: [gkjh.subs(e, numbers) for e in exprs]
+
+    @benchmark(f"round_vals {_name}")
+    def bench_round_vals(vals=_vals):
+        resolved = {k: sp.sympify(v).evalf() for k, v in gkjh.subs_vals(vals).items()}
+        return lambda: gkjh.round_vals(resolved, 3)
+
+    @benchmark(f"split_units_vals {_name}")
+    def bench_split_units_vals(vals=_vals):
+        resolved = gkjh.subs_vals(sheets.with_units(vals))
+        return lambda: gkjh.split_units_vals(resolved)
+
+    @benchmark(f"convert_units {_name}")
+    def bench_convert_units(vals=_vals):
+        numbers = [v for v in gkjh.subs_vals(vals).values() if isinstance(v, sp.Number)]
+        return lambda: [
+            gkjh.convert_units(v * units.km / units.hour, units.m / units.s)
+            for v in numbers
+        ]
+
+    @benchmark(f"display_vals_v2 {_name}")
+    def bench_display_vals_v2(vals=_vals):
+        _stub_display()
+        resolved = gkjh.subs_vals(vals)
+        return lambda: gkjh.display_vals_v2(resolved)
+
+    @benchmark(f"display_vals_v2 batch {_name}")
+    def bench_display_vals_v2_batch(vals=_vals):
+        _stub_display()
+        resolved = gkjh.subs_vals(vals)
+        return lambda: gkjh.display_vals_v2(resolved, batch=True)
+
+    @benchmark(f"display_vals units {_name}")
+    def bench_display_vals(vals=_vals):
+        _stub_display()
+        resolved = gkjh.subs_vals(vals)
+        keys = [k for k, v in resolved.items() if isinstance(v, sp.Number)]
+        to_display = [(k, units.km / units.hour, units.m / units.s) for k in keys]
+        return lambda: gkjh.display_vals(resolved, to_display)
+
+    @benchmark(f"lambdify_vals {_name}")
+    def bench_lambdify_vals(vals=_vals):
+        free = set()
+        for v in vals.values():
+            free |= sp.sympify(v).free_symbols - set(vals)
+        return lambda: gkjh.lambdify_vals(vals, sorted(free, key=str))
@@ -14,31 +14,88 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
+"""
+GKJH: Gary Kim Jupyter Helpers.
+
+Submodules are only imported on first use of one of their attributes (see
+PEP 562), so that `import gkjh` does not pay for sympy, pandas or IPython
+until they are needed.
+"""
+
+import importlib
 from importlib.metadata import version, PackageNotFoundError
-from .expr_formatting import round_expr, scin_expr
-from .misc import (
-    subs,
-    phasor2sympy,
-    sympy2phasor,
-    sphasor2str,
-    sphasor2euler,
-    put_units,
-    strip_units,
-    get_units,
-    clean_units,
-    display_eqns,
-    display_vals,
-    display_vals_v2,
-    display_knowns,
-    display_boxed,
-    circuit_series,
-    circuit_parallel,
-    pd_num,
-    subs_vals,
-    package_versions,
-    short_assign,
-)
-from . import lambdas
+
+_submodules = {
+    "expr_formatting": [
+        "round_expr",
+        "scin_expr",
+        "round_vals",
+        "scin_vals",
+    ],
+    "misc": [
+        "subs",
+        "phasor2sympy",
+        "sympy2phasor",
+        "sphasor2str",
+        "sphasor2euler",
+        "put_units",
+        "split_units",
+        "split_units_vals",
+        "strip_units",
+        "get_units",
+        "clean_units",
+        "convert_units",
+        "display_eqns",
+        "display_vals",
+        "display_vals_v2",
+        "display_knowns",
+        "display_boxed",
+        "circuit_series",
+        "circuit_parallel",
+        "pd_num",
+        "pd_nums",
+        "subs_vals",
+        "cse_vals",
+        "package_versions",
+        "short_assign",
+    ],
+    "cache": ["subs_cache", "disk_cache"],
+    "instrumentation": ["instrument"],
+    "circuits": [
+        "phasors2complex",
+        "complex2phasors",
+        "phasors2str",
+        "complex2euler",
+        "circuit_reduce",
+        "compile_response",
+        "frequency_response",
+    ],
+    "numeric": ["lambdify_vals", "sweep_vals"],
+    "export": ["export_vals", "export_sweep"],
+    "sheet": ["SolvedSheet", "Sheet"],
+    "lambdas": [],
+    "dependencies": [],
+    "parallel": [],
+}
+
+_attributes = {a: m for m, attrs in _submodules.items() for a in attrs}
+
+__all__ = list(_attributes) + list(_submodules)
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _attributes:
+        tr = getattr(importlib.import_module(f".{_attributes[name]}", __name__), name)
+        globals()[name] = tr
+        return tr
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 try:
     __version__ = version("gkjh")
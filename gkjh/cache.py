@@ -0,0 +1,352 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Opt-in caching of subs results as part of GKJH.
+
+Results are keyed on the expression along with a fingerprint of the contents
+of vals, so changing vals means later calls miss the cache rather than give
+stale results.
+
+Example use:
+```
+import gkjh
+
+with gkjh.subs_cache() as cache:
+    gkjh.display_vals_v2(vals, [(a, gkjh.lambdas.subs(vals))])
+    cache.info()  # {'hits': ..., 'misses': ..., 'size': ..., 'maxsize': 1024}
+```
+
+subs_vals results can also be kept on disk, by default in ~/.cache/gkjh, so
+that they survive kernel restarts. These are keyed on a hash of the srepr of
+vals along with the sympy and gkjh versions, and the least recently used are
+removed once the cache is over its size limit.
+```
+with gkjh.disk_cache():
+    vals = gkjh.subs_vals(vals)  # slow the first time, fast from then on
+```
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+import sympy as sp
+
+from .parallel import pack, unpack
+
+try:
+    from . import __version__ as _gkjh_version
+except ImportError:
+    # package is not installed
+    _gkjh_version = None
+
+_active = None
+_active_disk = None
+
+# Change when the format of disk cache entries or subs_vals results changes
+DISK_CACHE_FORMAT = 1
+
+
+class SubsCache:
+    """A bounded least recently used cache of subs results."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def info(self) -> dict:
+        """Give the hit and miss counts along with the size of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, compute):
+        """Give the entry for key, calling compute to make it if missing."""
+        try:
+            tr = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            tr = self._entries[key] = compute()
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return tr
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return tr
+
+
+def typed_key(value) -> tuple:
+    """
+    typed_key gives a key for value that only matches values of its type.
+
+    Keying on value alone would make equal values of different types, such
+    as Integer(2) and Float(2.0) or 1 and 1.0, share an entry.
+    """
+    return (type(value), value)
+
+
+def vals_fingerprint(vals: dict) -> tuple:
+    """
+    vals_fingerprint gives a hashable key for vals' contents.
+
+    The contents themselves are used rather than just their hash, so vals
+    with colliding hashes (e.g. {a: -1} and {a: -2}) never share entries.
+    """
+    if hasattr(vals, "fingerprint"):
+        # e.g. a Sheet, which changes its fingerprint whenever it changes
+        return vals.fingerprint()
+    return tuple((k, typed_key(v)) for k, v in vals.items())
+
+
+def enable_subs_cache(maxsize=1024) -> SubsCache:
+    """Start caching subs results, giving the SubsCache used."""
+    global _active
+    _active = SubsCache(maxsize)
+    return _active
+
+
+def disable_subs_cache():
+    """Stop caching subs results."""
+    global _active
+    _active = None
+
+
+def active_subs_cache():
+    """Give the SubsCache in use, if any."""
+    return _active
+
+
+@contextmanager
+def subs_cache(maxsize=1024):
+    """Cache subs results within a with block, yielding the SubsCache."""
+    global _active
+    previous = _active
+    _active = SubsCache(maxsize)
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def cached_subs(func):
+    """Decorate subs to use the active SubsCache, if any."""
+
+    @functools.wraps(func)
+    def wrapper(expr, vals, *args, **kwargs):
+        cache = _active
+        if cache is None:
+            return func(expr, vals, *args, **kwargs)
+        try:
+            key = (
+                typed_key(expr),
+                vals_fingerprint(vals),
+                args,
+                tuple(kwargs.items()),
+            )
+            hash(key)
+        except TypeError:
+            return func(expr, vals, *args, **kwargs)
+        return cache.lookup(key, lambda: func(expr, vals, *args, **kwargs))
+
+    return wrapper
+
+
+def default_cache_dir() -> Path:
+    """default_cache_dir gives $XDG_CACHE_HOME/gkjh, or ~/.cache/gkjh."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "gkjh"
+
+
+def vals_digest(vals: dict) -> str:
+    """
+    vals_digest gives a hash of the srepr of vals that is stable across runs.
+
+    The sympy and gkjh versions are included, so upgrading either makes
+    entries made before miss the cache.
+    """
+    h = hashlib.sha256()
+    h.update(f"{DISK_CACHE_FORMAT} {sp.__version__} {_gkjh_version}".encode())
+    for k, v in vals.items():
+        h.update(f"\n{sp.srepr(k)}: {sp.srepr(v)}".encode())
+    return h.hexdigest()
+
+
+class DiskCache:
+    """A size bounded least recently used cache of results in a directory."""
+
+    suffix = ".gkjh"
+
+    def __init__(self, path=None, max_bytes=256 * 2**20):
+        self.path = Path(path) if path is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _entries(self) -> list:
+        """Give (last used, size, path) of each entry, least recently used first."""
+        try:
+            files = list(os.scandir(self.path))
+        except FileNotFoundError:
+            return []
+        tr = []
+        for f in files:
+            if f.name.endswith(self.suffix):
+                stat = f.stat()
+                tr.append((stat.st_mtime, stat.st_size, f.path))
+        return sorted(tr)
+
+    def info(self) -> dict:
+        """Give the hit and miss counts along with the size of the cache."""
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(e[1] for e in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        for _, _, path in self._entries():
+            Path(path).unlink(missing_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, file: Path):
+        with open(file, "rb") as f:
+            packed, data = pickle.loads(zlib.decompress(f.read()))
+        tr = unpack(data) if packed else data
+        # mark as recently used for eviction
+        os.utime(file)
+        return tr
+
+    def _store(self, file: Path, value):
+        # pickle is much faster to load, but cannot handle undefined
+        # functions (e.g. `sp.Function("d")`), see gkjh.parallel
+        try:
+            data = pickle.dumps((False, value))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            data = pickle.dumps((True, pack(value)))
+        data = zlib.compress(data)
+        self.path.mkdir(parents=True, exist_ok=True)
+        # write then rename so other kernels never read a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, file)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(e[1] for e in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            Path(path).unlink(missing_ok=True)
+            total -= size
+
+    def lookup(self, key: str, compute):
+        """Give the entry for key, calling compute to make it if missing."""
+        file = self.path / (key + self.suffix)
+        try:
+            tr = self._load(file)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # a corrupt or incompatible entry is recomputed
+            file.unlink(missing_ok=True)
+        else:
+            self.hits += 1
+            return tr
+        self.misses += 1
+        tr = compute()
+        try:
+            self._store(file, tr)
+        except OSError:
+            # an unwritable cache only loses the caching
+            pass
+        return tr
+
+
+def enable_disk_cache(path=None, max_bytes=256 * 2**20) -> DiskCache:
+    """Start keeping subs_vals results on disk, giving the DiskCache used."""
+    global _active_disk
+    _active_disk = DiskCache(path, max_bytes)
+    return _active_disk
+
+
+def disable_disk_cache():
+    """Stop keeping subs_vals results on disk."""
+    global _active_disk
+    _active_disk = None
+
+
+def active_disk_cache():
+    """Give the DiskCache in use, if any."""
+    return _active_disk
+
+
+@contextmanager
+def disk_cache(path=None, max_bytes=256 * 2**20):
+    """Keep subs_vals results on disk within a with block, yielding the DiskCache."""
+    global _active_disk
+    previous = _active_disk
+    _active_disk = DiskCache(path, max_bytes)
+    try:
+        yield _active_disk
+    finally:
+        _active_disk = previous
+
+
+def disk_cached(func):
+    """
+    Decorate subs_vals to use the active DiskCache, if any.
+
+    Arguments other than vals (such as processes) must not change the result.
+    """
+
+    @functools.wraps(func)
+    def wrapper(vals, *args, **kwargs):
+        cache = _active_disk
+        # a Sheet resolves itself through func with a plain dict
+        if cache is None or hasattr(vals, "resolved"):
+            return func(vals, *args, **kwargs)
+        key = func.__name__ + "-" + vals_digest(vals)
+        return cache.lookup(key, lambda: func(vals, *args, **kwargs))
+
+    return wrapper
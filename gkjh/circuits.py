@@ -0,0 +1,245 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Numeric circuit analysis functions as part of GKJH.
+
+These work on NumPy arrays of many values at once, where the functions in
+gkjh.misc (e.g. phasor2sympy) work exactly on one sympy value at a time.
+Angles are in degrees, as in gkjh.misc.
+"""
+
+import heapq
+
+import numpy as np
+import sympy as sp
+
+from .misc import subs
+
+
+def phasors2complex(magnitude, angle) -> np.ndarray:
+    """phasors2complex is phasor2sympy for arrays, giving complex arrays."""
+    magnitude = np.asarray(magnitude, dtype=float)
+    return magnitude * np.exp(1j * np.deg2rad(np.asarray(angle, dtype=float)))
+
+
+def complex2phasors(values, round_value=None) -> dict:
+    """
+    complex2phasors is sympy2phasor for arrays of complex values.
+
+    Returns a dict of magnitude and angle arrays, rounded to round_value
+    decimal places if given.
+    """
+    values = np.asarray(values, dtype=complex)
+    mag = np.abs(values)
+    ang = np.rad2deg(np.angle(values))
+    if round_value is not None:
+        mag = np.round(mag, round_value)
+        ang = np.round(ang, round_value)
+    return {"magnitude": mag, "angle": ang}
+
+
+def phasors2str(values, round_value) -> np.ndarray:
+    """
+    phasors2str is sphasor2str for arrays of complex values.
+
+    Both the magnitude and angle are written as rounded floats.
+    """
+    tmp = complex2phasors(values, round_value)
+    return np.array(
+        [
+            str(m) + "⦟" + str(a)
+            for m, a in zip(
+                tmp["magnitude"].ravel().tolist(), tmp["angle"].ravel().tolist()
+            )
+        ]
+    ).reshape(tmp["magnitude"].shape)
+
+
+def complex2euler(values) -> tuple:
+    """
+    complex2euler is sphasor2euler for arrays of complex values.
+
+    Returns the magnitude and angle in radians of each value, such that
+    value = magnitude * exp(1j * angle).
+    """
+    values = np.asarray(values, dtype=complex)
+    return np.abs(values), np.angle(values)
+
+
+def circuit_reduce(edges, a, b):
+    """
+    circuit_reduce gives the impedance between nodes a and b of a network.
+
+    edges is a list of (node, node, impedance) for each element, where nodes
+    can be any hashable names. Every other node is eliminated by star-mesh
+    transforms, which covers series (2 neighbours), wye-delta (3 neighbours)
+    and any other arrangement, with parallel elements combined as they meet.
+    Nodes with the fewest neighbours are eliminated first so that ladders
+    and other sparse networks stay sparse.
+
+    If every impedance is a number this is done with complex floats.
+    Otherwise it is done symbolically, with each admittance kept as a single
+    cancelled fraction rather than the nested reciprocals that chaining
+    circuit_series and circuit_parallel gives.
+
+    Example use:
+    ```
+    import sympy as sp
+    from gkjh.circuits import circuit_reduce
+
+    R = sp.Symbol("R")
+
+    # Wheatstone bridge
+    edges = [(1, 2, R), (1, 3, R), (2, 3, R), (2, 4, R), (3, 4, 2 * R)]
+    circuit_reduce(edges, 1, 4)  # 13*R/11
+    ```
+    """
+    symbolic = any(isinstance(z, sp.Basic) and not z.is_number for _, _, z in edges)
+    if symbolic:
+        zero, infinity = sp.Integer(0), sp.oo
+        tidy = sp.cancel
+    else:
+        zero, infinity = 0j, complex(np.inf)
+        tidy = lambda y: y
+
+    # Merge nodes joined by shorts
+    parent = {}
+
+    def find(n):
+        while parent.get(n, n) != n:
+            n = parent[n]
+        return n
+
+    for u, v, z in edges:
+        if z == 0:
+            parent[find(u)] = find(v)
+    a, b = find(a), find(b)
+    if a == b:
+        return zero
+
+    adj = {a: {}, b: {}}
+    for u, v, z in edges:
+        u, v = find(u), find(v)
+        if u == v or z == 0:
+            continue
+        y = 1 / (z if symbolic else complex(z))
+        adj.setdefault(u, {})
+        adj.setdefault(v, {})
+        adj[u][v] = tidy(adj[u].get(v, zero) + y)
+        adj[v][u] = adj[u][v]
+
+    def merge(keep, other):
+        for m, y in adj.pop(other).items():
+            del adj[m][other]
+            if m != keep:
+                adj[keep][m] = adj[m][keep] = tidy(adj[keep].get(m, zero) + y)
+
+    heap = [(len(n), i, node) for i, (node, n) in enumerate(adj.items())]
+    heapq.heapify(heap)
+    count = len(heap)
+    while heap:
+        degree, _, node = heapq.heappop(heap)
+        if node in (a, b) or node not in adj or degree != len(adj[node]):
+            # terminal, already eliminated or stale entry
+            continue
+        neighbours = adj.pop(node)
+        total = tidy(sum(neighbours.values(), zero))
+        items = list(neighbours.items())
+        for n, _ in items:
+            del adj[n][node]
+        touched = [n for n, _ in items]
+        if total == 0:
+            # The admittances cancel (e.g. a series LC at resonance), so the
+            # node shorts together the neighbours it is not open to
+            shorted = [n for n, y in items if y != 0]
+            if a in shorted and b in shorted:
+                return zero
+            if shorted:
+                keep = a if a in shorted else b if b in shorted else shorted[0]
+                for n in shorted:
+                    if n != keep:
+                        merge(keep, n)
+                touched = [n for n in touched if n in adj] + list(adj[keep])
+        else:
+            for i, (n, y_n) in enumerate(items):
+                for m, y_m in items[i + 1 :]:
+                    y = tidy(adj[n].get(m, zero) + y_n * y_m / total)
+                    adj[n][m] = adj[m][n] = y
+        for n in touched:
+            count += 1
+            heapq.heappush(heap, (len(adj[n]), count, n))
+
+    y = adj[a].get(b, zero)
+    if y == 0:
+        return infinity
+    return tidy(1 / y)
+
+
+def compile_response(expr, s, vals=None, angular=False):
+    """
+    compile_response compiles expr, in the Laplace variable s, for sweeps.
+
+    vals are substituted into expr first, after which s must be its only
+    free symbol. Returns a function taking an array of frequencies, in Hz
+    (or rad/s if angular is True), that gives a dict of the frequencies, the
+    complex response at s = jω, and its magnitude and angle in degrees.
+    The response can be given straight to phasors2str and the magnitude and
+    angle to phasors2complex.
+
+    Example use:
+    ```
+    import numpy as np
+    import matplotlib.pyplot as plt
+    from gkjh.circuits import compile_response
+
+    bode = compile_response(circuit_parallel(R, 1 / (s * C)), s, vals)
+    tr = bode(np.logspace(1, 6, 500))
+    plt.semilogx(tr["frequency"], 20 * np.log10(tr["magnitude"]))
+    ```
+    """
+    if vals is not None:
+        expr = subs(expr, vals)
+    expr = sp.sympify(expr)
+    unknown = expr.free_symbols - {s}
+    if unknown:
+        raise ValueError(
+            "cannot compile response, unresolved: "
+            + ", ".join(sorted(str(u) for u in unknown))
+        )
+    func = sp.lambdify(s, expr, modules="numpy")
+
+    def response(frequencies) -> dict:
+        frequencies = np.asarray(frequencies, dtype=float)
+        omega = frequencies if angular else 2 * np.pi * frequencies
+        values = np.broadcast_to(
+            np.asarray(func(1j * omega), dtype=complex), frequencies.shape
+        )
+        tr = complex2phasors(values)
+        return {
+            "frequency": frequencies,
+            "response": values,
+            "magnitude": tr["magnitude"],
+            "angle": tr["angle"],
+        }
+
+    return response
+
+
+def frequency_response(expr, s, frequencies, vals=None, angular=False) -> dict:
+    """
+    frequency_response evaluates expr over frequencies, see compile_response.
+    """
+    return compile_response(expr, s, vals, angular)(frequencies)
@@ -0,0 +1,103 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Dependency graph functions for vals dicts as part of GKJH.
+
+A vals dict maps symbols (or applied functions) to their definitions. The
+functions here work out which keys each definition refers to so that the
+definitions can be resolved in dependency order.
+"""
+
+import sympy as sp
+from sympy.core.function import AppliedUndef
+
+
+def function_keys(vals: dict) -> dict:
+    """function_keys maps each function head in vals to its keys."""
+    tr = {}
+    for k in vals:
+        if isinstance(k, AppliedUndef):
+            tr.setdefault(k.func, []).append(k)
+    return tr
+
+
+def val_dependencies(expr, vals: dict, functions=None) -> set:
+    """
+    val_dependencies gives the set of keys of vals that expr refers to.
+
+    A function application such as `d(3)` depends on every key with the same
+    function head (e.g. `d(a)`), as subs expands it using that definition.
+    """
+    # not only Basic, as e.g. a mutable sp.Matrix is not one
+    if not hasattr(expr, "free_symbols") or not hasattr(expr, "atoms"):
+        return set()
+    if functions is None:
+        functions = function_keys(vals)
+
+    tr = {s for s in expr.free_symbols if s in vals}
+    if functions:
+        for f in expr.atoms(AppliedUndef):
+            tr.update(functions.get(f.func, ()))
+    for k in vals:
+        if not isinstance(k, (sp.Symbol, AppliedUndef)) and expr.has(k):
+            tr.add(k)
+    return tr
+
+
+def dependency_graph(vals: dict) -> dict:
+    """dependency_graph maps each key of vals to the keys its value uses."""
+    functions = function_keys(vals)
+    return {k: val_dependencies(v, vals, functions) for k, v in vals.items()}
+
+
+def topological_order(graph: dict) -> list:
+    """
+    topological_order sorts the keys of graph so dependencies come first.
+
+    Keys are otherwise kept in their original order. Raises a ValueError
+    naming the cycle if the graph is not acyclic.
+    """
+    index = {k: i for i, k in enumerate(graph)}
+    done = set()
+    tr = []
+
+    for root in graph:
+        if root in done:
+            continue
+        path = [root]
+        on_path = {root}
+        stack = [iter(sorted(graph[root], key=index.__getitem__))]
+        while stack:
+            for dep in stack[-1]:
+                if dep in done:
+                    continue
+                if dep in on_path:
+                    cycle = path[path.index(dep) :] + [dep]
+                    raise ValueError(
+                        "cyclic dependency in vals: "
+                        + " -> ".join(str(c) for c in cycle)
+                    )
+                path.append(dep)
+                on_path.add(dep)
+                stack.append(iter(sorted(graph[dep], key=index.__getitem__)))
+                break
+            else:
+                stack.pop()
+                node = path.pop()
+                on_path.discard(node)
+                done.add(node)
+                tr.append(node)
+    return tr
@@ -0,0 +1,142 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Exporting results to files as part of GKJH.
+
+Rows are built and written a chunk at a time, so only one chunk of LaTeX
+strings and DataFrame rows is held in memory at once. The format is taken
+from the file extension: .csv, .jsonl (JSON Lines) or .parquet. Parquet needs
+pyarrow, which can be installed with `pip install gkjh[parquet]`.
+
+Example use:
+```
+import gkjh
+
+gkjh.export_vals(gkjh.subs_vals(vals), "run.csv")
+gkjh.export_sweep(gkjh.sweep_vals(vals, sweeps), "sweep.parquet")
+```
+"""
+
+from itertools import islice
+from pathlib import Path
+
+import pandas as pd
+import sympy as sp
+
+from .misc import _number, cached_latex, split_units
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".parquet": "parquet"}
+
+VALS_COLUMNS = ["key", "value", "unit", "latex"]
+
+
+def _file_format(path, file_format):
+    """_file_format gives file_format, or the format of path's extension."""
+    if file_format is None:
+        file_format = FORMATS.get(Path(path).suffix.lower())
+        if file_format is None:
+            raise ValueError(
+                f"cannot tell the format of {path}, give file_format as one of: "
+                + ", ".join(FORMATS.values())
+            )
+    if file_format not in FORMATS.values():
+        raise ValueError(f"unknown file format: {file_format}")
+    return file_format
+
+
+def vals_rows(vals: dict):
+    """
+    vals_rows gives the key, value, unit and LaTeX of each value of vals.
+
+    value is the magnitude as a float, or NaN if it is not a real number, and
+    unit is empty for values without units.
+    """
+    for k, v in vals.items():
+        magnitude, unit = split_units(v)
+        yield (
+            str(k),
+            _number(magnitude),
+            "" if unit == 1 else str(unit),
+            cached_latex(v if isinstance(v, sp.Basic) else sp.sympify(v)),
+        )
+
+
+def vals_chunks(vals: dict, chunksize=1000):
+    """vals_chunks gives the rows of vals_rows as DataFrames of chunksize rows."""
+    rows = vals_rows(vals)
+    chunk = list(islice(rows, chunksize))
+    # an empty vals still gives the columns
+    yield pd.DataFrame(chunk, columns=VALS_COLUMNS)
+    while chunk := list(islice(rows, chunksize)):
+        yield pd.DataFrame(chunk, columns=VALS_COLUMNS)
+
+
+def write_chunks(frames, path, file_format=None):
+    """
+    write_chunks writes each DataFrame of frames to path as it is made.
+
+    The DataFrames should all have the same columns.
+    """
+    file_format = _file_format(path, file_format)
+    if file_format == "parquet":
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "writing Parquet files needs pyarrow, install gkjh[parquet]"
+            ) from e
+        writer = None
+        try:
+            for df in frames:
+                table = pyarrow.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    with open(path, "w", newline="") as f:
+        for i, df in enumerate(frames):
+            if file_format == "csv":
+                df.to_csv(f, header=i == 0, index=False)
+            elif not df.empty:
+                df.to_json(f, orient="records", lines=True, double_precision=15)
+
+
+def export_vals(vals: dict, path, file_format=None, chunksize=1000):
+    """
+    export_vals writes the key, value, unit and LaTeX of each value of vals.
+
+    vals is written chunksize rows at a time, see vals_rows for the columns.
+    """
+    write_chunks(vals_chunks(vals, chunksize), path, file_format)
+
+
+def export_sweep(df: pd.DataFrame, path, file_format=None, chunksize=100000):
+    """
+    export_sweep writes the results of sweep_vals chunksize rows at a time.
+
+    The symbols labelling the columns are written as their names.
+    """
+    columns = [str(c) for c in df.columns]
+    frames = (
+        df.iloc[i : i + chunksize].set_axis(columns, axis=1)
+        for i in range(0, max(len(df), 1), chunksize)
+    )
+    write_chunks(frames, path, file_format)
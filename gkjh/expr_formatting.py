@@ -22,34 +22,110 @@ There are known bugs in this implementation.
 import sympy as sp
 import math
 
+from .cache import typed_key
+from .instrumentation import instrument_module
+
+
+def exponent10(val) -> int:
+    """
+    exponent10 gives the base 10 exponent of a sympy number, ignoring its sign.
+
+    The exponent is found exactly from the integer numerator and denominator
+    of the number rather than with a symbolic log and floor.
+    """
+    val = sp.Rational(val)
+    p, q = abs(val.p), val.q
+    tr = len(str(p)) - len(str(q))
+    if tr >= 0:
+        if p < q * 10**tr:
+            tr -= 1
+    elif p * 10**-tr < q:
+        tr -= 1
+    return tr
+
+
+def _significand_conversion(num_digits, base):
+    """_significand_conversion makes the do_conversion of round_expr."""
 
-def round_expr(expr, num_digits, zeros=False, evalf=False):
     def do_conversion(val):
         if val == 0:
             return 0
-        length = sp.floor(sp.log(val, 10))
+        if not (val.is_Rational or val.is_Float):
+            # e.g. oo or nan
+            return val
+        length = sp.Integer(exponent10(val))
         tmp = val * 10**-length
-        tmp = round(tmp, num_digits)
-        return tmp * 10**length
+        if num_digits != math.inf:
+            tmp = round(tmp, num_digits)
+        # a Float just under a power of ten (e.g. 1e-7 in binary) can round up
+        if abs(tmp) >= 10:
+            tmp /= 10
+            length += 1
+        return tmp * base**length
+
+    return do_conversion
 
+
+def _xreplace_numbers(expr, do_conversion, memo):
+    tmp = {}
+    for n in expr.atoms(sp.Number):
+        key = typed_key(n)
+        if key not in memo:
+            memo[key] = do_conversion(n)
+        tmp[n] = memo[key]
+    return expr.xreplace(tmp)
+
+
+def round_expr(expr, num_digits, zeros=False, evalf=False, memo=None):
+    """
+    round_expr rounds every number in expr to num_digits.
+
+    Numbers are rounded to num_digits after the decimal point if zeros is
+    True and to num_digits + 1 significant figures otherwise. memo can be a
+    dict to reuse roundings of the same numbers between calls.
+    """
     if not hasattr(expr, "xreplace"):
         return round(expr, num_digits)
 
     if evalf and hasattr(expr, "evalf"):
         expr = expr.evalf()
 
+    if memo is None:
+        memo = {}
     if zeros:
-        return expr.xreplace({n: round(n, num_digits) for n in expr.atoms(sp.Number)})
-    return expr.xreplace({n: do_conversion(n) for n in expr.atoms(sp.Number)})
+        return _xreplace_numbers(expr, lambda n: round(n, num_digits), memo)
+    return _xreplace_numbers(
+        expr, _significand_conversion(num_digits, sp.Integer(10)), memo
+    )
 
 
-def scin_expr(expr, num_digits=math.inf):
-    def do_conversion(val):
-        if val == 0:
-            return 0
-        length = sp.floor(sp.log(val, 10))
-        tmp = val * 10**-length
-        tmp = round(tmp, num_digits)
-        return tmp * sp.UnevaluatedExpr(10) ** length
+def scin_expr(expr, num_digits=math.inf, memo=None):
+    """
+    scin_expr writes every number in expr in scientific notation.
+
+    memo can be a dict to reuse conversions of the same numbers between calls.
+    """
+    if memo is None:
+        memo = {}
+    return _xreplace_numbers(
+        expr, _significand_conversion(num_digits, sp.UnevaluatedExpr(10)), memo
+    )
+
+
+def round_vals(vals: dict, num_digits, zeros=False, evalf=False) -> dict:
+    """
+    round_vals runs round_expr(v, num_digits, zeros, evalf) for all of vals.
+
+    Numbers shared between values are only rounded once.
+    """
+    memo = {}
+    return {k: round_expr(v, num_digits, zeros, evalf, memo) for k, v in vals.items()}
+
+
+def scin_vals(vals: dict, num_digits=math.inf) -> dict:
+    """scin_vals runs scin_expr(v, num_digits) for all values in vals."""
+    memo = {}
+    return {k: scin_expr(v, num_digits, memo) for k, v in vals.items()}
+
 
-    return expr.xreplace({n: do_conversion(n) for n in expr.atoms(sp.Number)})
+instrument_module(globals())
@@ -0,0 +1,175 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Opt-in instrumentation of GKJH functions.
+
+While instrumentation is on, every public function of gkjh.misc,
+gkjh.expr_formatting and the stages made by gkjh.lambdas record how often
+they are called, how long they take (including any gkjh functions they call),
+how many iterations subs loops for and the size of the expressions given.
+
+Example use:
+```
+import gkjh
+
+with gkjh.instrument() as stats:
+    vals = gkjh.subs_vals(vals)
+    gkjh.display_vals_v2(vals)
+
+stats.summary()  # DataFrame with a row per function
+```
+"""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+
+import sympy as sp
+
+_active = None
+
+
+class Instrumentation:
+    """Statistics recorded while instrumentation is on."""
+
+    columns = ["calls", "seconds", "iterations", "total_size", "max_size"]
+
+    def __init__(self):
+        self.stats = {}
+
+    def _row(self, name):
+        try:
+            return self.stats[name]
+        except KeyError:
+            tr = self.stats[name] = dict.fromkeys(self.columns, 0)
+            return tr
+
+    def record(self, name, seconds, size):
+        """Record a call of name."""
+        row = self._row(name)
+        row["calls"] += 1
+        row["seconds"] += seconds
+        row["total_size"] += size
+        row["max_size"] = max(row["max_size"], size)
+
+    def add_iterations(self, name, iterations):
+        """Record iterations of a loop in name, such as that of subs."""
+        self._row(name)["iterations"] += iterations
+
+    def summary(self):
+        """Give the statistics as a DataFrame, slowest functions first."""
+        # pandas is only imported here so that importing gkjh.misc does not
+        # import it
+        import pandas as pd
+
+        df = pd.DataFrame.from_dict(self.stats, orient="index", columns=self.columns)
+        df.index.name = "function"
+        df["mean_seconds"] = df["seconds"] / df["calls"].where(df["calls"] > 0)
+        df["mean_size"] = df["total_size"] / df["calls"].where(df["calls"] > 0)
+        return df.sort_values("seconds", ascending=False)
+
+
+def expr_size(value) -> int:
+    """expr_size gives the number of nodes in value, or its length if a dict."""
+    if isinstance(value, sp.Basic):
+        return sum(1 for _ in sp.preorder_traversal(value))
+    if isinstance(value, dict):
+        return len(value)
+    return 1
+
+
+def enable_instrumentation() -> Instrumentation:
+    """Start recording, giving the Instrumentation used."""
+    global _active
+    _active = Instrumentation()
+    return _active
+
+
+def disable_instrumentation():
+    """Stop recording."""
+    global _active
+    _active = None
+
+
+def active_instrumentation():
+    """Give the Instrumentation in use, if any."""
+    return _active
+
+
+@contextmanager
+def instrument():
+    """Record within a with block, yielding the Instrumentation."""
+    global _active
+    previous = _active
+    _active = Instrumentation()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def add_iterations(name, iterations):
+    """Record iterations of a loop in name, if instrumentation is on."""
+    if _active is not None:
+        _active.add_iterations(name, iterations)
+
+
+def record_call(name, func, *args, **kwargs):
+    """Call func, recording the call as name if instrumentation is on."""
+    recorder = _active
+    if recorder is None:
+        return func(*args, **kwargs)
+    size = expr_size(args[0]) if args else 0
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        recorder.record(name, time.perf_counter() - start, size)
+
+
+def instrumented(func, name=None):
+    """Decorate func to be recorded while instrumentation is on."""
+    if name is None:
+        name = func.__module__.replace("gkjh.", "", 1) + "." + func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _active is None:
+            return func(*args, **kwargs)
+        return record_call(name, func, *args, **kwargs)
+
+    return wrapper
+
+
+def instrument_module(namespace: dict, exclude=()):
+    """
+    instrument_module decorates the public functions defined in a module.
+
+    Call as instrument_module(globals()) at the end of the module. As the
+    module's own calls go through its globals, these are recorded too, so
+    recursive functions should recurse through an undecorated private
+    function. Functions named in exclude are left as they are.
+    """
+    module = namespace["__name__"]
+    for name, value in list(namespace.items()):
+        if name.startswith("_") or name in exclude:
+            continue
+        if not inspect.isfunction(value):
+            continue
+        if value.__module__ != module:
+            continue
+        namespace[name] = instrumented(value)
@@ -13,9 +13,26 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
 
+from .stage import Stage
+from ..cache import typed_key
+from ..misc import subs_vals as gkjh_subs_vals
+from ..parallel import map_processes, pack, unpack
+
+
+def _run_packed(task):
+    """Run a chain on values in a worker process, see chaining.map_vals."""
+    factories = importlib.import_module(".subs", __package__)
+    stages, values = unpack(task)
+    chain = chaining(*(getattr(factories, name)(*args) for name, args in stages))
+    return pack([chain(v) for v in values])
+
+
 class chaining:
     """
     Class for chaining lambda functions, mostly used for display_vals_v2.
@@ -39,14 +56,109 @@ class chaining:
     ```
     """
 
-    def __init__(self, *funcs, **kwargs):
+    def __init__(self, *funcs, timed=False, **kwargs):
+        """
+        Chain the given funcs together.
+
+        If timed is True, the number of calls and time spent in each stage
+        is recorded for timings.
+        """
         funcs = list(funcs)
         if not all([callable(func) for func in funcs]):
             raise ValueError("All given funcs must be callable")
         self.funcs = funcs
+        self.timed = timed
+
+        self.stages = list(funcs)
+        self._times = [[0, 0.0] for _ in funcs]
+
+    def map_vals(self, vals: dict, keys=None, workers=None, executor="thread"):
+        """
+        Apply the chain to every value of vals, or only those of keys.
+
+        Returns a new dict in the order of keys (or vals). Work is shared
+        between keys: a leading subs of vals itself is done for every key at
+        once with subs_vals, and values that are the same are only run
+        through the rest of the chain once.
+
+        If workers is given, the values are run through the chain in a pool
+        of that many threads, or processes if executor is "process". The
+        process pool can only be used when every stage of the chain was made
+        by a gkjh.lambdas function.
+
+        Example use:
+        ```
+        import gkjh
+
+        ls = gkjh.lambdas.chaining(gkjh.lambdas.subs(vals), gkjh.lambdas.evalf())
+        ls.map_vals(vals)
+        ```
+        """
+        if keys is None:
+            keys = list(vals)
+        values = [vals[k] for k in keys]
+        stages = list(self.stages)
+
+        first = stages[0] if stages else None
+        if isinstance(first, Stage) and first.name == "subs":
+            if first.args[0] is vals:
+                resolved = gkjh_subs_vals(vals)
+                values = [resolved[k] for k in keys]
+                stages = stages[1:]
+        rest = chaining(*stages)
+
+        unique = {}
+        for v in values:
+            try:
+                unique.setdefault(typed_key(v), v)
+            except TypeError:
+                unique.setdefault((type(v), id(v)), v)
+        todo = list(unique.values())
+
+        if workers is None:
+            done = [rest(v) for v in todo]
+        elif executor == "thread":
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                done = list(pool.map(rest, todo))
+        elif executor == "process":
+            if not all(isinstance(s, Stage) for s in rest.stages):
+                raise ValueError("process pools need every stage from gkjh.lambdas")
+            described = [(s.name, s.args) for s in rest.stages]
+            chunks = [todo[i::workers] for i in range(workers)]
+            tasks = [pack((described, c)) for c in chunks if c]
+            results = map_processes(_run_packed, tasks, workers)
+            done = [None] * len(todo)
+            for i, r in enumerate(results):
+                done[i::workers] = unpack(r)
+        else:
+            raise ValueError(f"unknown executor: {executor}")
+
+        results = dict(zip(unique, done))
+        tr = {}
+        for k, v in zip(keys, values):
+            try:
+                tr[k] = results[typed_key(v)]
+            except (KeyError, TypeError):
+                tr[k] = results[(type(v), id(v))]
+        return tr
+
+    def timings(self) -> list:
+        """Give (stage name, calls, seconds) for each stage, if timed."""
+        return [
+            (getattr(f, "name", getattr(f, "__name__", repr(f))), calls, seconds)
+            for f, (calls, seconds) in zip(self.stages, self._times)
+        ]
 
     def __call__(self, args):
         tr = args
-        for func in self.funcs:
+        if not self.timed:
+            for func in self.stages:
+                tr = func(tr)
+            return tr
+
+        for func, times in zip(self.stages, self._times):
+            start = time.perf_counter()
             tr = func(tr)
+            times[0] += 1
+            times[1] += time.perf_counter() - start
         return tr
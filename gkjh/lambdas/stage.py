@@ -0,0 +1,42 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Stages as made by the gkjh.lambdas functions.
+"""
+
+from ..instrumentation import record_call
+
+
+class Stage:
+    """
+    A single argument callable that remembers how it was made.
+
+    The gkjh.lambdas functions return these so that chaining can recognise
+    them, e.g. to name them in timings or rebuild them in worker processes.
+    name is the gkjh.lambdas function that made the stage and args the
+    arguments it was given.
+    """
+
+    def __init__(self, name, func, *args):
+        self.name = name
+        self.func = func
+        self.args = args
+
+    def __call__(self, x):
+        return record_call("lambdas." + self.name, self.func, x)
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, args={self.args!r})"
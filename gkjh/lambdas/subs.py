@@ -37,7 +37,9 @@ display_vals_v2(vals, [a, subs_lambdas.subs(vals)])
 
 from typing import Optional
 
+from .stage import Stage
 from ..misc import (
+    convert_units as gkjh_convert_units,
     put_units as gkjh_put_units,
     round_expr as gkjh_round_expr,
     subs as gkjh_subs,
@@ -57,7 +59,7 @@ def subs(vals: dict):
     display_vals_v2(vals, [(a, gkjh.lambdas.subs(vals))])
     ```
     """
-    return lambda x: gkjh_subs(x, vals)
+    return Stage("subs", lambda x: gkjh_subs(x, vals), vals)
 
 
 def put_units(desired_unit):
@@ -73,7 +75,28 @@ def put_units(desired_unit):
     display_vals_v2(vals, [(v, gkjh.lambdas.put_units(units.m / units.s))])
     ```
     """
-    return lambda x: gkjh_put_units(x, desired_unit)
+    return Stage("put_units", lambda x: gkjh_put_units(x, desired_unit), desired_unit)
+
+
+def convert_units(target, unit_system="SI"):
+    """
+    Call convert_units with a given target unit.
+
+    Example use:
+    ```
+    import sympy.physics.units as units
+    import gkjh
+    from gkjh import display_vals_v2
+
+    display_vals_v2(vals, [(v, gkjh.lambdas.convert_units(units.km / units.hour))])
+    ```
+    """
+    return Stage(
+        "convert_units",
+        lambda x: gkjh_convert_units(x, target, unit_system),
+        target,
+        unit_system,
+    )
 
 
 def evalf():
@@ -90,7 +113,7 @@ def evalf():
     display_vals_v2(vals, [(v, gkjh.lambdas.evalf())])
     ```
     """
-    return lambda x: x.evalf() if "evalf" in dir(x) else x
+    return Stage("evalf", lambda x: x.evalf() if "evalf" in dir(x) else x)
 
 
 def round_expr(figures: int, zeros: Optional[bool]):
@@ -104,4 +127,6 @@ def round_expr(figures: int, zeros: Optional[bool]):
     gkjh.display_vals_v2(vals, [(v, gkjh.lambdas.round_expr(3))])
     ```
     """
-    return lambda x: gkjh_round_expr(x, figures, zeros)
+    return Stage(
+        "round_expr", lambda x: gkjh_round_expr(x, figures, zeros), figures, zeros
+    )
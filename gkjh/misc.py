@@ -19,21 +19,45 @@ Miscellaneous functions as part of GKJH.
 Many unnecessary functions are currently part of this module
 """
 
+import functools
 import math
 import importlib
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 
-try:
-    from IPython.display import display, display_latex
-except ImportError:
-    display = lambda *a, **b: None
-    display_latex = lambda *a, **b: None
-
 import sympy as sp
+from sympy.core.function import AppliedUndef
 from sympy.physics import units
 
-from .expr_formatting import round_expr
+from .cache import cached_subs, disk_cached, typed_key
+from .instrumentation import add_iterations, instrument_module
+from .expr_formatting import round_expr, scin_expr
+from .dependencies import (
+    dependency_graph,
+    function_keys,
+    topological_order,
+    val_dependencies,
+)
+from .parallel import pack, pack_dict, unpack, unpack_dict
+
+
+def display(*args, **kwargs):
+    """IPython's display, only imported once something is displayed."""
+    try:
+        from IPython.display import display as ipython_display
+    except ImportError:
+        return None
+    return ipython_display(*args, **kwargs)
+
+
+def display_latex(*args, **kwargs):
+    """IPython's display_latex, only imported once something is displayed."""
+    try:
+        from IPython.display import display_latex as ipython_display_latex
+    except ImportError:
+        return None
+    return ipython_display_latex(*args, **kwargs)
 
 
 def package_versions(
@@ -93,36 +117,305 @@ def pd_num(num, make_scin=False):
     return scin_expr(tmp, make_scin)
 
 
-def match_by_function(tfunc, vals):
-    for k, _ in vals.items():
-        if k.func == tfunc:
-            return k
-    return None
+def pd_nums(nums, make_scin=False):
+    """
+    pd_nums runs pd_num on each of nums, converting each distinct number once.
+
+    A pandas Series (e.g. a column read back from export_vals) gives a Series
+    with the same index, anything else gives a list.
+    """
+    converted = {}
+
+    def convert(n):
+        key = typed_key(n)
+        try:
+            return converted[key]
+        except KeyError:
+            tr = converted[key] = pd_num(n, make_scin)
+            return tr
+
+    if hasattr(nums, "map"):
+        return nums.map(convert)
+    return [convert(n) for n in nums]
+
+
+def function_index(vals: dict) -> dict:
+    """
+    function_index maps the function heads of the keys of vals to the keys.
+
+    Each function head maps to a dict from number of arguments to key, with
+    None giving the first key of any number of arguments.
+    """
+    tr = {}
+    for k in vals:
+        if isinstance(k, sp.Function):
+            arities = tr.setdefault(k.func, {})
+            arities.setdefault(len(k.args), k)
+            arities.setdefault(None, k)
+    return tr
+
+
+def match_by_function(tfunc, vals, nargs=None, index=None):
+    """
+    match_by_function gives the key of vals with the function head tfunc.
+
+    Keys with nargs arguments are preferred if given. A function_index of vals
+    can be given to avoid scanning vals.
+    """
+    if index is None:
+        index = function_index(vals)
+    arities = index.get(tfunc)
+    if arities is None:
+        return None
+    return arities.get(nargs, arities[None])
+
+
+def _can_xreplace(expr, vals) -> bool:
+    """_can_xreplace checks if subs can use xreplace, see subs."""
+    for k, v in vals.items():
+        if not isinstance(k, (sp.Symbol, sp.Function)):
+            return False
+        if not isinstance(v, (int, float, complex, sp.Number)):
+            return False
+    # Derivatives have variables but no bound_symbols, and subs turns them
+    # into Subs where xreplace would differentiate by a number
+    return not any(
+        getattr(n, "bound_symbols", None) or isinstance(n, sp.Derivative)
+        for n in sp.preorder_traversal(expr)
+    )
+
+
+SUBS_MAX_NODES = 10**6
 
 
-def subs(expr, vals, recurse=math.inf):
+def _pending_keys(expr, vals, index) -> set:
+    """_pending_keys gives the symbols and function applications left to replace."""
+    tr = {s for s in expr.free_symbols if s in vals}
+    if index:
+        tr.update(f for f in expr.atoms(AppliedUndef) if f.func in index)
+    return tr
+
+
+def _count_nodes(expr, limit) -> int:
+    """_count_nodes counts the nodes of expr, stopping once over limit."""
+    tr = 0
+    for _ in sp.preorder_traversal(expr):
+        tr += 1
+        if tr > limit:
+            break
+    return tr
+
+
+def _check_cycle(pending, vals):
+    """_check_cycle raises a ValueError if pending keys refer to themselves."""
+    functions = function_keys(vals)
+    graph = {}
+    todo = [p for p in pending if isinstance(p, sp.Symbol)]
+    for p in pending:
+        if isinstance(p, AppliedUndef):
+            todo.extend(functions.get(p.func, ()))
+    while todo:
+        k = todo.pop()
+        if k in graph:
+            continue
+        graph[k] = val_dependencies(vals[k], vals, functions)
+        todo.extend(graph[k])
+    topological_order(graph)
+
+
+@cached_subs
+def subs(expr, vals, recurse=math.inf, method=None, evaluate=True, max_nodes=None):
+    """
+    subs substitutes vals into expr until the result stops changing.
+
+    Function applications such as `d(3)` are expanded using the definition of
+    a matching function key such as `d(a)`.
+
+    method may be "subs", to use sympy's subs, or "xreplace", to replace
+    every key at once structurally. xreplace is much faster but only replaces
+    exact occurrences of keys, so it suits vals whose values are numbers or
+    already resolved expressions. If method is not given, xreplace is chosen
+    when every key of vals is a symbol or function application, every value
+    is a number and expr has no bound symbols (e.g. from an Integral) or
+    derivatives.
+    Otherwise subs is used. evaluate=False builds the xreplace results
+    without evaluating them.
+
+    When every key of vals is a symbol or function application, subs stops
+    as soon as none of them are left in the result. Raises a ValueError if
+    the values of the symbols left refer to themselves or if the result grows
+    past max_nodes nodes (SUBS_MAX_NODES if not given), naming the symbols
+    still being substituted.
+    """
     if "subs" not in dir(expr):
         return expr
+    # with keys other than symbols and function applications (e.g. units)
+    # only the result stopping changing can say that subs is done
+    simple_keys = None
+    if method is None:
+        method = "xreplace" if _can_xreplace(expr, vals) else "subs"
+        if method == "xreplace":
+            simple_keys = True
+    if method == "xreplace":
+        vals = {k: sp.sympify(v) for k, v in vals.items()}
+    elif method != "subs":
+        raise ValueError(f"unknown subs method: {method}")
+    if max_nodes is None:
+        max_nodes = SUBS_MAX_NODES
+
+    def replace(e, rule):
+        if method == "subs":
+            return e.subs(rule)
+        with sp.evaluate(evaluate):
+            return e.xreplace(rule)
+
     current_index = 0
     n_expr = expr
+    index = None
     while True:
         expr = n_expr
-        n_expr = expr.subs(vals)
-        if n_expr == expr or current_index >= recurse:
-            return n_expr
-        for x in n_expr.atoms(sp.Function):
+        n_expr = replace(expr, vals)
+        # an unchanged first pass leaves applications such as d(3) as they are
+        if current_index >= recurse or (current_index == 0 and n_expr == expr):
+            current_index += 1
+            break
+        # sorted so that the order of expansion does not depend on hashing
+        for x in sorted(n_expr.atoms(sp.Function), key=sp.default_sort_key):
             if not all((isinstance(z, sp.Symbol) for z in x.args)):
-                t_func = match_by_function(x.func, vals)
+                if index is None:
+                    # vals does not change within a call, so build this once
+                    index = function_index(vals)
+                t_func = match_by_function(x.func, vals, len(x.args), index)
                 if t_func is None:
                     continue
-                tmp = vals[t_func].subs(dict(zip(t_func.args, x.args)))
-                n_expr = n_expr.subs(x, tmp)
+                tmp = replace(vals[t_func], dict(zip(t_func.args, x.args)))
+                n_expr = replace(n_expr, {x: tmp})
         current_index += 1
+        # expansion can leave new applications (e.g. d(d(3)) becoming d(11))
+        # that only the next pass expands, so only stop once both are done
+        if n_expr == expr:
+            break
+
+        if not hasattr(n_expr, "free_symbols"):
+            continue
+        if index is None and n_expr.has(AppliedUndef):
+            index = function_index(vals)
+        pending = _pending_keys(n_expr, vals, index)
+        if not pending:
+            if simple_keys is None:
+                simple_keys = all(
+                    isinstance(k, (sp.Symbol, AppliedUndef)) for k in vals
+                )
+            if simple_keys:
+                break
+        # every pass replaces at least one level of definitions, so symbols
+        # still left after this many passes must be in a cycle
+        if current_index == len(vals) + 1 and recurse == math.inf:
+            _check_cycle(pending, vals)
+        # results of the first passes are small, only count nodes after
+        if current_index >= 2 and _count_nodes(n_expr, max_nodes) > max_nodes:
+            pending.update(
+                k for k in vals if not isinstance(k, sp.Symbol) and n_expr.has(k)
+            )
+            raise ValueError(
+                f"subs result grew past {max_nodes} nodes after "
+                f"{current_index} passes, still substituting: "
+                + ", ".join(sorted(str(n) for n in pending))
+            )
+    add_iterations("misc.subs", current_index)
+    return n_expr
+
+
+def _resolve_val(key, value, deps, resolved):
+    """
+    _resolve_val substitutes the already resolved deps into value.
+
+    Returns a tuple of the value to use when substituting key into other
+    values and the fully resolved value of key. These only differ for function
+    keys (e.g. `d(a)`), whose arguments are left free so that applications
+    such as `d(3)` can still be expanded from it.
+    """
+    if isinstance(key, sp.Symbol) or not hasattr(key, "args"):
+        tmp = subs(value, {d: resolved[d] for d in deps})
+        return tmp, tmp
+    args = set(key.args)
+    template = subs(value, {d: resolved[d] for d in deps if d not in args})
+    return template, subs(template, {d: resolved[d] for d in deps if d in args})
+
+
+def _resolve_val_packed(task):
+    """_resolve_val for use in worker processes, see gkjh.parallel."""
+    key, value, resolved = task
+    resolved = unpack_dict(resolved)
+    tr = _resolve_val(unpack(key), unpack(value), resolved.keys(), resolved)
+    return pack(tr[0]), pack(tr[1])
+
+
+@disk_cached
+def subs_vals(vals: dict, processes=None) -> dict:
+    """
+    subs_vals runs subs(v, vals) for all values in vals.
+
+    The values are resolved once each in dependency order, substituting only
+    the already resolved values they refer to. Raises a ValueError naming the
+    cycle if the values of vals refer to each other cyclically.
+
+    If processes is given, values that do not depend on each other are
+    resolved in parallel in a pool of that many processes. The result is the
+    same as without.
 
+    A Sheet (or SolvedSheet) gives the resolved values it keeps.
+    """
+    if processes is None and hasattr(vals, "resolved"):
+        return vals.resolved()
+    graph = dependency_graph(vals)
+    order = topological_order(graph)
+    resolved = {}
+    tr = {}
+
+    if processes is None:
+        for k in order:
+            resolved[k], tr[k] = _resolve_val(k, vals[k], graph[k], resolved)
+        return {k: tr[k] for k in vals}
+
+    # Group keys into levels that only depend on keys in earlier levels
+    levels = {}
+    for k in order:
+        levels[k] = max((levels[d] + 1 for d in graph[k]), default=0)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for level in range(max(levels.values(), default=-1) + 1):
+            keys = [k for k in order if levels[k] == level]
+            tasks = [
+                (pack(k), pack(vals[k]), pack_dict({d: resolved[d] for d in graph[k]}))
+                for k in keys
+            ]
+            for k, (a, b) in zip(keys, pool.map(_resolve_val_packed, tasks)):
+                resolved[k], tr[k] = unpack(a), unpack(b)
+    return {k: tr[k] for k in vals}
+
+
+def cse_vals(vals: dict, symbols=None) -> dict:
+    """
+    cse_vals resolves vals and pulls out subexpressions shared by the values.
+
+    Returns a vals dict starting with the shared subexpressions, named from
+    symbols (x0, x1, ... by default), followed by every key of vals with its
+    resolved value written in terms of them. Running subs_vals on the result
+    gives back the result of subs_vals(vals).
+    """
+    resolved = subs_vals(vals)
+    keys = [k for k, v in resolved.items() if isinstance(v, sp.Basic)]
+    if symbols is None:
+        taken = set(vals)
+        for k in keys:
+            taken |= resolved[k].free_symbols
+        symbols = sp.numbered_symbols("x", exclude=taken)
 
-def subs_vals(vals: dict) -> dict:
-    """subs_vals runs subs(v, vals) for all values in vals."""
-    return {k: subs(v, vals) for k, v in vals.items()}
+    replacements, reduced = sp.cse([resolved[k] for k in keys], symbols)
+    tr = dict(replacements)
+    tr.update(resolved)
+    tr.update(zip(keys, reduced))
+    return tr
 
 
 def phasor2sympy(magnitude, angle):
@@ -162,24 +455,101 @@ def put_units(eqn, units):
     return sp.Mul(eqn, units, evaluate=False)
 
 
-def strip_units(expr):
+def _split_units_fallback(expr):
+    """_split_units_fallback splits expressions such as sums of mixed units."""
     au = expr.atoms(units.quantities.Quantity)
-    tmp = expr
-    for u in au:
-        tmp = tmp.subs(u, 1)
-    return tmp
+    nums = expr.xreplace({u: sp.Integer(1) for u in au})
+    tmp = expr.subs({n: 1 for n in expr.args if not n.has(units.quantities.Quantity)})
+    tmp = tmp.xreplace({n: sp.Integer(round(n, 0)) for n in tmp.atoms(sp.Number)})
+    return nums, tmp
+
+
+def split_units(expr):
+    """
+    split_units splits expr into a tuple of its magnitude and its units.
+
+    This is done in a single traversal of expr. Products and powers are split
+    factor by factor and sums whose terms all have the same units keep them.
+    Anything else with units, such as a sum of terms with different units,
+    is split as get_units and strip_units always have.
+    """
+    return _split_units(expr)
+
+
+def _split_units(expr):
+    """_split_units is split_units, called within gkjh so it is not instrumented."""
+    one = sp.Integer(1)
+    if not isinstance(expr, sp.Basic):
+        return expr, one
+    if isinstance(expr, units.quantities.Quantity):
+        return one, expr
+    if not expr.args:
+        return expr, one
+
+    parts = [_split_units(a) for a in expr.args]
+    if all(u == one for _, u in parts):
+        return expr, one
+    if isinstance(expr, sp.Mul):
+        return sp.Mul(*(m for m, _ in parts)), sp.Mul(*(u for _, u in parts))
+    if isinstance(expr, sp.Pow) and parts[1][1] == one:
+        return parts[0][0] ** expr.exp, parts[0][1] ** expr.exp
+    if isinstance(expr, sp.Add) and len({u for _, u in parts}) == 1:
+        return sp.Add(*(m for m, _ in parts)), parts[0][1]
+    return _split_units_fallback(expr)
+
+
+def _number(expr) -> float:
+    """_number gives expr as a float, or NaN if it is not a real number."""
+    try:
+        return float(expr)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def split_units_vals(vals: dict) -> dict:
+    """split_units_vals runs split_units(v) for all values in vals."""
+    return {k: _split_units(v) for k, v in vals.items()}
+
+
+def strip_units(expr):
+    return _split_units(expr)[0]
 
 
 def get_units(expr):
-    tmp = expr.subs({n: 1 for n in expr.args if not n.has(units.quantities.Quantity)})
-    tmp = tmp.xreplace({n: sp.Integer(round(n, 0)) for n in tmp.atoms(sp.Number)})
-    return tmp
+    return _split_units(expr)[1]
 
 
 def clean_units(expr):
-    us = get_units(expr)
-    nums = strip_units(expr)
-    return put_units(nums, us)
+    return put_units(*_split_units(expr))
+
+
+@functools.lru_cache(maxsize=1024)
+def _conversion_factor(source, target, unit_system):
+    return units.convert_to(source, list(target), unit_system)
+
+
+def convert_units(expr, target, unit_system="SI"):
+    """
+    convert_units gives expr converted to the target unit (or list of units).
+
+    Works as sympy's units.convert_to but the conversion of the units of expr
+    to the target is cached for each pair of units, so converting further
+    values with the same units is only a multiplication. The result is only
+    simplified if its magnitude is not already a number.
+    """
+    if not isinstance(target, (list, tuple)):
+        target = [target]
+    nums, us = _split_units(expr)
+    for u in sp.Mul.make_args(us):
+        if not isinstance(u.as_base_exp()[0], units.quantities.Quantity):
+            if u == 1:
+                continue
+            # split_units could not give one set of units (e.g. sums of mixed units)
+            return units.convert_to(expr, target, unit_system).simplify()
+    tr = nums * _conversion_factor(us, tuple(target), unit_system)
+    if not isinstance(nums, sp.Number):
+        tr = tr.simplify()
+    return tr
 
 
 def display_eqns(eqns):
@@ -189,51 +559,86 @@ def display_eqns(eqns):
     display("===== END =====")
 
 
-def display_vals(vals, to_display=False):
+@functools.lru_cache(maxsize=4096)
+def _cached_latex(key):
+    return sp.latex(key[1])
+
+
+def cached_latex(expr) -> str:
+    """cached_latex gives sp.latex(expr), remembering recent expressions."""
+    try:
+        return _cached_latex(typed_key(expr))
+    except TypeError:
+        return sp.latex(expr)
+
+
+def _display_rows(rows, batch, evaluate=None):
+    """
+    _display_rows displays each (lhs, rhs) of rows as an equation.
+
+    If batch is True, all of the rows are displayed together as one aligned
+    LaTeX block, which is much quicker to render for many rows.
+    """
+    if not batch:
+        for lhs, rhs in rows:
+            display(sp.Eq(lhs, rhs, evaluate=evaluate))
+        return
+
+    display_latex(
+        r"$$\begin{aligned}"
+        + r" \\ ".join(
+            cached_latex(lhs) + " &= " + cached_latex(rhs) for lhs, rhs in rows
+        )
+        + r"\end{aligned}$$",
+        raw=True,
+    )
+
+
+def display_vals(vals, to_display=False, batch=False):
     if isinstance(to_display, bool) and to_display == False:
         to_display = list(vals.keys())
 
     if not isinstance(to_display, (list)):
         to_display = [to_display]
 
+    rows = []
     for su in to_display:
         if isinstance(su, (tuple)):
             if len(su) == 3:
-                display(
-                    sp.Eq(
-                        su[0], units.convert_to(vals[su[0]] * su[1], su[2]).simplify()
-                    )
-                )
+                rows.append((su[0], convert_units(vals[su[0]] * su[1], su[2])))
                 continue
             if len(su) == 2:
-                display(sp.Eq(su[0], put_units(vals[su[0]], su[1])))
+                rows.append((su[0], put_units(vals[su[0]], su[1])))
                 continue
-        display(sp.Eq(su, vals[su]))
+        rows.append((su, vals[su]))
+    _display_rows(rows, batch)
 
 
-def display_vals_v2(vals, to_display=False):
+def display_vals_v2(vals, to_display=False, batch=False):
     if isinstance(to_display, bool) and to_display == False:
         to_display = list(vals.keys())
 
     if not isinstance(to_display, (list)):
         to_display = [to_display]
 
+    rows = []
     for su in to_display:
         if isinstance(su, (tuple)):
             if len(su) >= 2:
-                display(sp.Eq(su[0], su[1](vals[su[0]]), evaluate=False))
+                rows.append((su[0], su[1](vals[su[0]])))
                 continue
-        display(sp.Eq(su, vals[su], evaluate=False))
+        rows.append((su, vals[su]))
+    _display_rows(rows, batch, evaluate=False)
 
 
-def display_knowns(vals, to_display=False):
+def display_knowns(vals, to_display=False, batch=False):
     display("===== Knowns =====")
-    display_vals(vals, to_display)
+    display_vals(vals, to_display, batch)
     display("===== END =====")
 
 
 def display_boxed(eqn):
-    display_latex(r"$$\boxed{" + sp.latex(eqn) + r"}$$")
+    display_latex(r"$$\boxed{" + cached_latex(eqn) + r"}$$")
 
 
 def circuit_series(*args):
@@ -263,3 +668,7 @@ def short_assign(l):
     ```
     """
     yield l
+
+
+# display and display_latex only stand in for IPython's
+instrument_module(globals(), exclude=("display", "display_latex"))
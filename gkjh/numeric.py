@@ -0,0 +1,217 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Numeric evaluation of vals dicts as part of GKJH.
+
+Rather than resolving every value symbolically and calling evalf on each, the
+functions here compile the definitions in a vals dict into a single function
+using sympy.lambdify.
+"""
+
+import numpy as np
+import pandas as pd
+import sympy as sp
+from sympy.core.function import AppliedUndef
+from sympy.physics import units
+
+from .dependencies import dependency_graph, topological_order, val_dependencies
+from .misc import cse_vals, function_index, match_by_function
+from .parallel import map_processes, pack, pack_dict, unpack, unpack_dict
+
+
+def _expand_functions(expr, functions: dict, index: dict):
+    """
+    _expand_functions expands applications such as d(3) in expr.
+
+    Each is replaced by the definition of the matching function key of
+    functions (e.g. `d(x)`), with its arguments substituted in, until none
+    are left. functions must not define themselves recursively.
+    """
+    while True:
+        apps = sorted(
+            (f for f in expr.atoms(AppliedUndef) if f.func in index),
+            key=sp.default_sort_key,
+        )
+        if not apps:
+            return expr
+        rule = {}
+        for f in apps:
+            key = match_by_function(f.func, functions, len(f.args), index)
+            rule[f] = sp.sympify(functions[key]).subs(
+                dict(zip(key.args, f.args)), simultaneous=True
+            )
+        n_expr = expr.xreplace(rule)
+        if n_expr == expr:
+            return expr
+        expr = n_expr
+
+
+def _numeric_defs(vals: dict, inputs: list) -> dict:
+    """_numeric_defs gives the definitions of vals to compile, in order."""
+    functions = {k: v for k, v in vals.items() if isinstance(k, AppliedUndef)}
+    # raises naming the cycle if a function key applies itself
+    topological_order(dependency_graph(functions))
+    index = function_index(functions)
+    defs = {}
+    for k, v in vals.items():
+        if k in functions or k in inputs:
+            continue
+        v = sp.sympify(v)
+        if functions:
+            v = _expand_functions(v, functions, index)
+        defs[k] = v
+
+    graph = {k: val_dependencies(v, defs) for k, v in defs.items()}
+    order = topological_order(graph)
+
+    unknown = set()
+    for v in defs.values():
+        unknown.update(v.free_symbols - set(defs) - set(inputs))
+        unknown.update(v.atoms(AppliedUndef, units.quantities.Quantity))
+    if unknown:
+        raise ValueError(
+            "cannot evaluate vals numerically, unresolved: "
+            + ", ".join(sorted(str(u) for u in unknown))
+            + " (give them as inputs or use strip_units)"
+        )
+    return {k: defs[k] for k in order}
+
+
+def lambdify_vals(vals: dict, inputs=(), modules="math", cse=False):
+    """
+    lambdify_vals compiles vals into one function giving every value.
+
+    The returned function takes a value for each of the inputs, in order,
+    and returns a dict with the numeric value of every non-input key in vals.
+    Inputs may be keys of vals, in which case their definitions are ignored,
+    or symbols that are left free in vals. Function keys (e.g. `d(a)`) are
+    expanded into the values that use them rather than returned.
+
+    Definitions are computed in dependency order within the one generated
+    function, so each is only evaluated once per call. If cse is True, the
+    values are instead resolved and compiled with their shared subexpressions
+    pulled out by cse_vals.
+
+    Example use:
+    ```
+    import sympy as sp
+    from gkjh.numeric import lambdify_vals
+
+    a, b, c = sp.symbols("a, b, c")
+
+    vals = {}
+    vals[a] = 1
+    vals[b] = a + c
+    vals[c] = sp.sqrt(a)
+
+    f = lambdify_vals(vals, [a])
+    f(4)  # {b: 6.0, c: 2.0}
+    ```
+    """
+    inputs = list(inputs)
+    if cse:
+        defs = cse_vals({k: v for k, v in vals.items() if k not in inputs})
+        defs = _numeric_defs(defs, inputs)
+    else:
+        defs = _numeric_defs(vals, inputs)
+
+    names = {k: sp.Symbol(f"_x{i}") for i, k in enumerate(defs)}
+    args = [sp.Symbol(f"_i{i}") for i in range(len(inputs))]
+    rename = {**names, **dict(zip(inputs, args))}
+    cses = [(names[k], v.xreplace(rename)) for k, v in defs.items()]
+
+    keys = [k for k in vals if k in defs]
+    func = sp.lambdify(
+        args,
+        [names[k] for k in keys],
+        modules=modules,
+        cse=lambda exprs: (cses, exprs),
+    )
+
+    def evaluate(*values):
+        tr = func(*values)
+        if modules == "math":
+            tr = [float(v) if not isinstance(v, complex) else v for v in tr]
+        return dict(zip(keys, tr))
+
+    evaluate.inputs = inputs
+    evaluate.keys = keys
+    return evaluate
+
+
+def _sweep(vals: dict, inputs: list, arrays: list, cse=False) -> pd.DataFrame:
+    """_sweep evaluates vals for the given flat arrays of inputs."""
+    tr = dict(zip(inputs, arrays))
+    if arrays:
+        size = arrays[0].shape
+    else:
+        size = (1,)
+    for k, v in lambdify_vals(vals, inputs, "numpy", cse)(*arrays).items():
+        tr[k] = np.broadcast_to(v, size)
+    return pd.DataFrame(tr)
+
+
+def _sweep_packed(task):
+    """_sweep for use in worker processes, see gkjh.parallel."""
+    vals, inputs, arrays, cse = task
+    df = _sweep(unpack_dict(vals), [unpack(i) for i in inputs], arrays, cse)
+    return [pack(c) for c in df.columns], [df[c].to_numpy() for c in df.columns]
+
+
+def sweep_vals(
+    vals: dict, sweeps: dict, grid=False, processes=None, cse=False
+) -> pd.DataFrame:
+    """
+    sweep_vals evaluates every value of vals across arrays of inputs.
+
+    sweeps maps symbols to arrays of values for them, which are broadcast
+    together (or combined into a meshgrid if grid is True). Everything is
+    computed in one vectorised call of the lambdify_vals function. Returns a
+    DataFrame with a row per point and a column per symbol, starting with the
+    swept symbols.
+
+    If processes is given, the points are split into chunks that are
+    evaluated in a pool of that many processes. cse is passed on to
+    lambdify_vals.
+
+    Example use:
+    ```
+    import numpy as np
+    from gkjh.numeric import sweep_vals
+
+    df = sweep_vals(vals, {mach_exit: np.linspace(1, 5, 1000)})
+    df.plot(x=mach_exit, y=v_exit)
+    ```
+    """
+    inputs = list(sweeps)
+    arrays = [np.asarray(v) for v in sweeps.values()]
+    arrays = [v.astype(float) if v.dtype.kind in "biu" else v for v in arrays]
+    if grid:
+        arrays = np.meshgrid(*arrays, indexing="ij")
+    arrays = [v.ravel() for v in np.broadcast_arrays(*arrays)]
+
+    if processes is None or not arrays:
+        return _sweep(vals, inputs, arrays, cse)
+
+    packed_vals = pack_dict(vals)
+    packed_inputs = [pack(i) for i in inputs]
+    chunks = zip(*(np.array_split(v, processes) for v in arrays))
+    tasks = [(packed_vals, packed_inputs, list(c), cse) for c in chunks if len(c[0])]
+    frames = [
+        pd.DataFrame(dict(zip((unpack(c) for c in columns), values)))
+        for columns, values in map_processes(_sweep_packed, tasks, processes)
+    ]
+    return pd.concat(frames, ignore_index=True)
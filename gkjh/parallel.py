@@ -0,0 +1,81 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Process pool helpers as part of GKJH.
+
+sympy expressions using undefined functions (e.g. `sp.Function("d")`) cannot
+be pickled, so expressions are sent to and from worker processes as their
+srepr instead. Unit quantities are sent alongside by pickle so that they come
+back as quantities rather than symbols.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import sympy as sp
+from sympy.physics import units
+
+
+def pack(value):
+    """
+    pack gives a picklable form of value for use with unpack.
+
+    dicts, lists and tuples are packed item by item.
+    """
+    if isinstance(value, dict):
+        return ("dict", pack_dict(value))
+    if type(value) in (list, tuple):
+        return (type(value).__name__, [pack(v) for v in value])
+    if not isinstance(value, sp.Basic):
+        return (None, value)
+    quantities = {str(q): q for q in value.atoms(units.quantities.Quantity)}
+    return (sp.srepr(value), quantities)
+
+
+def unpack(packed):
+    """unpack gives back the value given to pack."""
+    text, value = packed
+    if text is None:
+        return value
+    if text == "dict":
+        return unpack_dict(value)
+    if text == "list":
+        return [unpack(v) for v in value]
+    if text == "tuple":
+        return tuple(unpack(v) for v in value)
+    return sp.sympify(text, locals=value)
+
+
+def pack_dict(vals: dict) -> list:
+    """pack_dict packs both the keys and values of vals."""
+    return [(pack(k), pack(v)) for k, v in vals.items()]
+
+
+def unpack_dict(packed: list) -> dict:
+    """unpack_dict gives back the dict given to pack_dict."""
+    return {unpack(k): unpack(v) for k, v in packed}
+
+
+def map_processes(func, tasks, processes):
+    """
+    map_processes runs func on each of tasks in a pool of processes.
+
+    Results are given back in the order of tasks.
+    """
+    tasks = list(tasks)
+    if len(tasks) <= 1:
+        return [func(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=min(processes, len(tasks))) as pool:
+        return list(pool.map(func, tasks))
@@ -0,0 +1,300 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Vals sheets as part of GKJH.
+"""
+
+import itertools
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from .dependencies import dependency_graph, topological_order, val_dependencies
+from .misc import _number, _resolve_val, split_units
+
+# Shared by all Sheets so that no two versions of any Sheets are the same
+_versions = itertools.count()
+
+
+class SolvedSheet(MutableMapping):
+    """
+    A vals dict that keeps the subs_vals result of itself up to date.
+
+    Assigning to a key only resolves that key again along with the keys that
+    depend on it. Indexing gives the resolved value and `definition` gives the
+    value as it was assigned.
+
+    Example use:
+    ```
+    import sympy as sp
+    from gkjh.sheet import SolvedSheet
+
+    a, b = sp.symbols("a, b")
+
+    sheet = SolvedSheet()
+    sheet[a] = 1
+    sheet[b] = a + a
+
+    sheet[b]  # 2
+    sheet[a] = 5
+    sheet[b]  # 10
+    ```
+    """
+
+    def __init__(self, vals=None):
+        self.vals = {}
+        self._graph = {}
+        self._rdeps = {}
+        self._order = []
+        self._resolved = {}
+        self._values = {}
+        if vals:
+            self.update(vals)
+
+    def definition(self, key):
+        """Give the value of key as it was assigned."""
+        return self.vals[key]
+
+    def resolved(self) -> dict:
+        """Give the resolved values as a plain dict, as from subs_vals."""
+        return {k: self._values[k] for k in self.vals}
+
+    def dependents(self, *keys) -> list:
+        """Give the keys that need resolving again if any of keys change."""
+        seen = set(keys)
+        todo = list(keys)
+        while todo:
+            for k in self._rdeps.get(todo.pop(), ()):
+                if k not in seen:
+                    seen.add(k)
+                    todo.append(k)
+        return [k for k in self._order if k in seen]
+
+    def update(self, *args, **kwargs):
+        # Rebuild once for a bulk update rather than once per key
+        new = dict(*args, **kwargs)
+        if not new:
+            return
+        old = self.vals
+        self.vals = {**old, **new}
+        try:
+            self._rebuild()
+        except ValueError:
+            self.vals = old
+            self._rebuild()
+            raise
+        # only the new keys and the keys using them can have changed
+        self._resolve(self.dependents(*new))
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __setitem__(self, key, value):
+        if key not in self.vals:
+            self.update({key: value})
+            return
+
+        old_value = self.vals[key]
+        old_deps = self._graph[key]
+        self.vals[key] = value
+        self._set_deps(key, val_dependencies(value, self.vals))
+        try:
+            self._order = topological_order(self._graph)
+        except ValueError:
+            self.vals[key] = old_value
+            self._set_deps(key, old_deps)
+            raise
+        self._resolve(self.dependents(key))
+
+    def __delitem__(self, key):
+        affected = self.dependents(key)
+        del self.vals[key]
+        self._rebuild()
+        self._resolved.pop(key)
+        self._values.pop(key)
+        self._resolve([k for k in self._order if k in affected])
+
+    def __iter__(self):
+        return iter(self.vals)
+
+    def __len__(self):
+        return len(self.vals)
+
+    def __repr__(self):
+        return f"SolvedSheet({self.resolved()!r})"
+
+    def _set_deps(self, key, deps):
+        for d in self._graph.get(key, ()):
+            self._rdeps[d].discard(key)
+        self._graph[key] = deps
+        for d in deps:
+            self._rdeps.setdefault(d, set()).add(key)
+
+    def _rebuild(self):
+        self._graph = dependency_graph(self.vals)
+        self._rdeps = {}
+        for k, deps in self._graph.items():
+            for d in deps:
+                self._rdeps.setdefault(d, set()).add(k)
+        self._order = topological_order(self._graph)
+
+    def _resolve(self, keys):
+        for k in keys:
+            self._resolved[k], self._values[k] = _resolve_val(
+                k, self.vals[k], self._graph[k], self._resolved
+            )
+
+
+class Sheet(MutableMapping):
+    """
+    A vals dict with its resolved values kept as columns.
+
+    Indexing gives the definition, as with a plain vals dict, so a Sheet can
+    be given to subs, display_vals_v2 or the lambdas in place of one. Its
+    definitions are kept in a SolvedSheet, so a change only resolves again
+    the keys that depend on it. subs_vals gives the resolved values, and
+    cached subs results are keyed on the sheet's version rather than its
+    contents.
+
+    Each key is given a position in an index when first assigned. The
+    numeric magnitudes (in a NumPy array, NaN where not a number) and units
+    of the resolved values are kept in columns aligned to that index.
+
+    Example use:
+    ```
+    import sympy as sp
+    from sympy.physics import units
+    from gkjh.sheet import Sheet
+
+    a, b = sp.symbols("a, b")
+
+    sheet = Sheet()
+    sheet[a] = 2 * units.meter
+    sheet[b] = a * 3
+
+    sheet.number(b)  # 6.0
+    sheet.unit(b)  # meter
+    sheet.numbers()  # array([2., 6.])
+    ```
+    """
+
+    def __init__(self, vals=None):
+        self._solved = SolvedSheet()
+        self._index = {}
+        self._keys = []
+        self._numbers = np.empty(8)
+        self._units = []
+        self._version = next(_versions)
+        if vals:
+            self.update(vals)
+
+    def index(self, key) -> int:
+        """Give the position of key in the columns."""
+        return self._index[key]
+
+    def definition(self, key):
+        """Give the value of key as it was assigned."""
+        return self._solved.vals[key]
+
+    def fingerprint(self) -> tuple:
+        """Give a value that changes whenever the sheet changes."""
+        return ("Sheet", self._version)
+
+    def resolved(self) -> dict:
+        """Give the resolved values as a plain dict, as from subs_vals."""
+        return self._solved.resolved()
+
+    def number(self, key) -> float:
+        """Give the resolved magnitude of key as a float, NaN if not a number."""
+        return float(self._numbers[self._index[key]])
+
+    def numbers(self) -> np.ndarray:
+        """Give a copy of the resolved magnitudes, in the order of the keys."""
+        return self._numbers[: len(self._keys)].copy()
+
+    def unit(self, key):
+        """Give the units of the resolved value of key."""
+        return self._units[self._index[key]]
+
+    def units(self) -> list:
+        """Give the units of the resolved values, in the order of the keys."""
+        return list(self._units)
+
+    def to_dict(self) -> dict:
+        """Give the definitions as a plain vals dict."""
+        return dict(self._solved.vals)
+
+    def update(self, *args, **kwargs):
+        # Let the SolvedSheet resolve once for a bulk update
+        new = dict(*args, **kwargs)
+        if not new:
+            return
+        self._solved.update(new)
+        self._add_keys(new)
+        self._changed(self._solved.dependents(*new))
+
+    def __getitem__(self, key):
+        return self._solved.vals[key]
+
+    def __setitem__(self, key, value):
+        self._solved[key] = value
+        self._add_keys([key])
+        self._changed(self._solved.dependents(key))
+
+    def __delitem__(self, key):
+        affected = [k for k in self._solved.dependents(key) if k != key]
+        del self._solved[key]
+        i = self._index.pop(key)
+        del self._keys[i]
+        del self._units[i]
+        n = len(self._keys)
+        self._numbers[i:n] = self._numbers[i + 1 : n + 1]
+        for k in self._keys[i:]:
+            self._index[k] -= 1
+        self._changed(affected)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return f"Sheet({self.to_dict()!r})"
+
+    def _add_keys(self, keys):
+        for k in keys:
+            if k in self._index:
+                continue
+            self._index[k] = len(self._keys)
+            self._keys.append(k)
+            self._units.append(None)
+        if len(self._keys) > len(self._numbers):
+            # grow geometrically so that adding keys one by one stays cheap
+            numbers = np.empty(2 * len(self._keys))
+            numbers[: len(self._numbers)] = self._numbers
+            self._numbers = numbers
+
+    def _changed(self, keys):
+        """Update the columns of the keys that were resolved again."""
+        for k in keys:
+            i = self._index[k]
+            magnitude, self._units[i] = split_units(self._solved[k])
+            self._numbers[i] = _number(magnitude)
+        self._version = next(_versions)
@@ -43,3 +43,57 @@ def test_chaining():
     assert sp.Eq(ls(d), 33 * units.m)
     assert sp.Eq(ls(e), 0.5 * units.m)
     assert sp.Eq(ls(f), sp.Rational(2, 1000) * units.m)
+
+
+def test_chaining_timings():
+    a, b = sp.symbols("a, b")
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = sp.Rational(1, 3)
+
+    ls = gkjh.lambdas.chaining(
+        gkjh.lambdas.subs(vals),
+        gkjh.lambdas.evalf(),
+        gkjh.lambdas.round_expr(3, zeros=True),
+        lambda x: x * 2,
+        timed=True,
+    )
+
+    for x in [a, a * b, sp.sqrt(a) + b]:
+        ls(x)
+
+    timings = ls.timings()
+    assert [name for name, _, _ in timings] == [
+        "subs",
+        "evalf",
+        "round_expr",
+        "<lambda>",
+    ]
+    assert all(calls == 3 and seconds >= 0 for _, calls, seconds in timings)
+
+
+def test_chaining_map_vals():
+    a, b, c, d = sp.symbols("a, b, c, d")
+
+    e = sp.Function("e")(a)
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = 6
+    vals[c] = a + b
+    vals[d] = c * 3 + e.subs(a, 2)
+    vals[e] = a / 2
+
+    ls = gkjh.lambdas.chaining(
+        gkjh.lambdas.subs(vals),
+        gkjh.lambdas.put_units(units.m),
+        gkjh.lambdas.evalf(),
+        gkjh.lambdas.round_expr(3, zeros=True),
+    )
+    expected = {k: ls(v) for k, v in vals.items()}
+
+    assert ls.map_vals(vals) == expected
+    assert list(ls.map_vals(vals, [d, a])) == [d, a]
+    assert ls.map_vals(vals, workers=2) == expected
+    assert ls.map_vals(vals, workers=2, executor="process") == expected
@@ -65,3 +65,13 @@ def test_round_expr():
     ls = gkjh.lambdas.round_expr(2, zeros=True)
 
     assert sp.Eq(ls(a), sp.Rational(32, 100))
+
+
+def test_convert_units():
+    ls = gkjh.lambdas.convert_units(units.m / units.s)
+
+    assert ls(36 * units.km / units.hour) == 10 * units.m / units.s
+    assert (
+        ls(sp.Symbol("x") * units.km / units.s)
+        == 1000 * sp.Symbol("x") * units.m / units.s
+    )
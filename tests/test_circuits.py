@@ -0,0 +1,130 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+
+import sympy as sp
+
+from gkjh import (
+    circuit_parallel,
+    circuit_reduce,
+    complex2euler,
+    complex2phasors,
+    compile_response,
+    frequency_response,
+    phasor2sympy,
+    phasors2complex,
+    phasors2str,
+    sphasor2str,
+    sympy2phasor,
+)
+
+
+def test_phasors2complex():
+    tr = phasors2complex([10, 2], [30, -90])
+
+    assert tr == pytest.approx([complex(phasor2sympy(10, 30)), -2j])
+
+
+def test_complex2phasors():
+    values = [3 + 4j, -1, 2j]
+
+    tr = complex2phasors(values, 3)
+
+    for i, v in enumerate(values):
+        exact = sympy2phasor(sp.sympify(v), 3)
+        assert tr["magnitude"][i] == pytest.approx(float(exact["magnitude"]))
+        assert tr["angle"][i] == pytest.approx(float(exact["angle"]))
+
+
+def test_phasors2str():
+    assert list(phasors2str([3 + 4j, -3 - 4j], 2)) == ["5.0⦟53.13", "5.0⦟-126.87"]
+    assert str(phasors2str(3 + 4j, 2)) == sphasor2str(3 + 4 * sp.I, 2)
+
+
+def test_complex2euler():
+    mag, ang = complex2euler(np.array([1j, -2]))
+
+    assert mag == pytest.approx([1, 2])
+    assert ang == pytest.approx([np.pi / 2, np.pi])
+
+
+def test_circuit_reduce():
+    R, C, s = sp.symbols("R, C, s")
+
+    # Wheatstone bridge, which needs a wye-delta transform
+    edges = [(1, 2, R), (1, 3, R), (2, 3, R), (2, 4, R), (3, 4, 2 * R)]
+
+    assert circuit_reduce(edges, 1, 4) == 13 * R / 11
+    assert (
+        sp.simplify(
+            circuit_reduce([("in", "out", R), ("in", "out", 1 / (s * C))], "in", "out")
+            - circuit_parallel(R, 1 / (s * C))
+        )
+        == 0
+    )
+
+
+def test_circuit_reduce_numeric():
+    edges = [(0, 1, 1), (1, 2, 0), (2, 3, 2 + 1j), (0, 3, 3), (4, 5, 1)]
+
+    assert circuit_reduce(edges, 0, 3) == pytest.approx(1 / (1 / 3 + 1 / (3 + 1j)))
+    assert circuit_reduce(edges, 1, 2) == 0
+    assert circuit_reduce(edges, 0, 5) == np.inf
+
+    # Ladder of 1000 sections
+    edges = []
+    for i in range(1000):
+        edges.append((i, i + 1, 1.0))
+        edges.append((i + 1, "ground", 2.0))
+
+    assert circuit_reduce(edges, 0, "ground") == pytest.approx(2)
+
+
+def test_circuit_reduce_resonance():
+    # Series LC at resonance is a short
+    assert circuit_reduce([(1, 2, 1j), (2, 3, -1j)], 1, 3) == 0
+    edges = [(1, 2, 1j), (2, 3, -1j), (3, 4, 2), (1, 4, 2), (2, 5, 7)]
+    assert circuit_reduce(edges, 1, 4) == pytest.approx(1)
+
+    X = sp.Symbol("X", positive=True)
+    assert circuit_reduce([(1, 2, sp.I * X), (2, 3, -sp.I * X)], 1, 3) == 0
+    edges = [(1, 2, sp.I * X), (2, 3, -sp.I * X), (3, 4, X)]
+    assert circuit_reduce(edges, 1, 4) == X
+
+
+def test_frequency_response():
+    R, C, s = sp.symbols("R, C, s")
+
+    vals = {}
+    vals[R] = 1000
+    vals[C] = sp.Rational(1, 10**6)
+
+    frequencies = np.logspace(0, 5, 51)
+    tr = frequency_response(circuit_parallel(R, 1 / (s * C)), s, frequencies, vals)
+    expected = 1 / (1 / 1000 + 2j * np.pi * frequencies / 10**6)
+
+    assert tr["response"] == pytest.approx(expected)
+    assert tr["magnitude"] == pytest.approx(np.abs(expected))
+    assert tr["angle"] == pytest.approx(np.rad2deg(np.angle(expected)))
+    assert phasors2complex(tr["magnitude"], tr["angle"]) == pytest.approx(expected)
+    assert len(phasors2str(tr["response"], 2)) == 51
+
+    assert frequency_response(R, s, [1, 2], vals)["magnitude"] == pytest.approx(
+        [1000, 1000]
+    )
+    with pytest.raises(ValueError, match="C"):
+        compile_response(1 / (s * C), s)
@@ -0,0 +1,108 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+import sympy as sp
+
+from gkjh import subs_vals
+from gkjh.dependencies import dependency_graph, topological_order
+
+
+def test_dependency_graph():
+    a, b, c = sp.symbols("a, b, c")
+    d = sp.Function("d")(a)
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = d * a
+    vals[c] = d.subs(a, 3)
+    vals[d] = a * 4
+
+    graph = dependency_graph(vals)
+
+    assert graph[a] == set()
+    assert graph[b] == {a, d}
+    assert graph[c] == {d}
+    assert graph[d] == {a}
+
+
+def test_topological_order():
+    a, b, c, d = sp.symbols("a, b, c, d")
+
+    vals = {}
+    vals[d] = c * 3
+    vals[c] = a + b
+    vals[a] = 5
+    vals[b] = 6
+
+    assert topological_order(dependency_graph(vals)) == [a, b, c, d]
+
+
+def test_cycle():
+    a, b, c = sp.symbols("a, b, c")
+
+    vals = {}
+    vals[a] = b + 1
+    vals[b] = c * 2
+    vals[c] = a
+
+    with pytest.raises(ValueError, match="a -> b -> c -> a"):
+        subs_vals(vals)
+
+
+def test_subs_vals_with_fns():
+    a, b, c, e = sp.symbols("a, b, c, e")
+
+    d = sp.Function("d")(a)
+
+    vals = {}
+    vals[b] = 4
+    vals[c] = d * 5
+    vals[d] = a * 4 + b
+    vals[e] = d.subs(a, 3) + b
+
+    vals = subs_vals(vals)
+
+    assert vals[b] == 4
+    assert sp.Eq(vals[c], 20 * a + 20, evaluate=True)
+    assert sp.Eq(vals[d], 4 * a + 4, evaluate=True)
+    assert vals[e] == 20
+
+
+def test_subs_vals_with_chained_fns():
+    a, b, c, x = sp.symbols("a, b, c, x")
+    d = sp.Function("d")
+
+    vals = {}
+    vals[a] = 2
+    vals[d(x)] = x**2 + a
+    vals[b] = d(3)
+    vals[c] = d(a) + d(b)
+
+    # d(d(3)) must be expanded fully whichever application is expanded first
+    assert subs_vals(vals)[c] == 129
+
+
+def test_subs_vals_with_matrix():
+    a, b, m = sp.symbols("a, b, m")
+
+    vals = {}
+    vals[a] = 2
+    vals[b] = a + 1
+    vals[m] = sp.Matrix([a, 2 * b])
+
+    assert dependency_graph(vals)[m] == {a, b}
+    assert subs_vals(vals)[m] == sp.Matrix([2, 6])
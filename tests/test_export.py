@@ -0,0 +1,80 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+import sympy as sp
+import sympy.physics.units as units
+
+import gkjh
+from gkjh import export_sweep, export_vals, pd_nums
+
+
+def test_export_vals(tmp_path):
+    a, b, c = sp.symbols("a, b, c")
+    vals = {a: 2 * units.meter, b: sp.Rational(1, 3), c: a + b}
+
+    export_vals(vals, tmp_path / "vals.csv", chunksize=2)
+    df = pd.read_csv(tmp_path / "vals.csv", keep_default_na=False)
+    assert list(df.columns) == ["key", "value", "unit", "latex"]
+    assert list(df["key"]) == ["a", "b", "c"]
+    assert list(df["unit"]) == ["meter", "", ""]
+    assert list(df["latex"]) == [sp.latex(v) for v in vals.values()]
+    nums = pd_nums(df["value"].replace("", "nan"))
+    assert nums[0] == 2
+    assert nums[2] is sp.nan
+
+    export_vals(vals, tmp_path / "vals.jsonl", chunksize=2)
+    with open(tmp_path / "vals.jsonl") as f:
+        rows = [json.loads(line) for line in f]
+    assert rows[1]["value"] == pytest.approx(1 / 3)
+    assert rows[2]["value"] is None
+
+    export_vals({}, tmp_path / "empty.csv")
+    assert pd.read_csv(tmp_path / "empty.csv").empty
+
+    with pytest.raises(ValueError):
+        export_vals(vals, tmp_path / "vals.txt")
+
+
+def test_export_sweep(tmp_path):
+    a, b = sp.symbols("a, b")
+    df = gkjh.sweep_vals({a: 1, b: 2 * a}, {a: np.linspace(0, 1, 5)})
+
+    export_sweep(df, tmp_path / "sweep.csv", chunksize=2)
+    read = pd.read_csv(tmp_path / "sweep.csv")
+    assert list(read.columns) == ["a", "b"]
+    assert np.allclose(read["b"], 2 * read["a"])
+
+    if importlib.util.find_spec("pyarrow") is None:
+        with pytest.raises(ImportError):
+            export_sweep(df, tmp_path / "sweep.parquet")
+    else:
+        export_sweep(df, tmp_path / "sweep.parquet", chunksize=2)
+        assert pd.read_parquet(tmp_path / "sweep.parquet").equals(read)
+
+
+def test_pd_nums():
+    assert pd_nums(["1.5", "2", "1.5"]) == [sp.Float("1.5"), 2, sp.Float("1.5")]
+    nums = pd_nums([1, 1.0, 2.5])
+    assert isinstance(nums[0], sp.Integer)
+    assert isinstance(nums[1], sp.Float)
+    series = pd_nums(pd.Series([0.5, 0.5], index=["x", "y"]))
+    assert list(series.index) == ["x", "y"]
+    assert series["y"] == sp.Float(0.5)
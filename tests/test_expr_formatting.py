@@ -0,0 +1,67 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import math
+
+import sympy as sp
+
+from gkjh import round_expr, scin_expr, round_vals, scin_vals
+from gkjh.expr_formatting import exponent10
+
+
+def test_exponent10():
+    assert exponent10(sp.Integer(1000)) == 3
+    assert exponent10(sp.Integer(999)) == 2
+    assert exponent10(sp.Rational(1, 1000)) == -3
+    assert exponent10(sp.Rational(-3, 2000)) == -3
+    assert exponent10(sp.Float(1e-300)) == -300
+
+
+def test_round_expr():
+    x = sp.Symbol("x")
+
+    assert round_expr(sp.Rational(12345, 10) * x, 2) == sp.Float(1230) * x
+    assert round_expr(sp.Rational(-12345, 10) * x, 2) == sp.Float(-1230) * x
+    assert round_expr(sp.Float(0) * x + 1, 2) == 1
+    assert sp.Eq(
+        round_expr(sp.Rational(321, 1000), 2, zeros=True), sp.Rational(32, 100)
+    )
+
+
+def test_scin_expr():
+    x = sp.Symbol("x")
+
+    tmp = scin_expr(sp.Rational(-3, 2000) * x)
+
+    assert tmp.doit() == sp.Rational(-3, 2000) * x
+    assert sp.UnevaluatedExpr(10) ** -3 in tmp.args
+
+    # Floats just under a power of ten in binary
+    for value, exponent in [(1e-7, -7), (1e-4, -4), (1e3, 3)]:
+        for num_digits in [3, math.inf]:
+            tmp = scin_expr(sp.Float(value), num_digits)
+            assert tmp.args[0] == 1
+            assert tmp.args[1] == sp.UnevaluatedExpr(10) ** exponent
+
+
+def test_round_vals():
+    a, b = sp.symbols("a, b")
+
+    vals = {}
+    vals[a] = sp.Rational(12345, 10)
+    vals[b] = sp.Rational(-2, 3) * a
+
+    assert round_vals(vals, 2) == {k: round_expr(v, 2) for k, v in vals.items()}
+    assert scin_vals(vals, 2) == {k: scin_expr(v, 2) for k, v in vals.items()}
@@ -0,0 +1,78 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import subprocess
+import sys
+
+import pytest
+
+import gkjh
+
+
+def run_python(code):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+def test_import_is_lazy():
+    tr = run_python(
+        "import sys, gkjh; "
+        "print(sorted({'sympy', 'pandas', 'numpy', 'IPython'} & set(sys.modules)))"
+    )
+
+    assert tr.stdout.strip() == "[]"
+
+
+def test_subs_does_not_import_pandas():
+    tr = run_python(
+        "import sys, gkjh; gkjh.subs; "
+        "print(sorted({'pandas', 'IPython'} & set(sys.modules)))"
+    )
+
+    assert tr.stdout.strip() == "[]"
+
+
+def test_sheet_does_not_import_pandas():
+    tr = run_python(
+        "import sys, gkjh; gkjh.Sheet; "
+        "print(sorted({'pandas', 'IPython'} & set(sys.modules)))"
+    )
+
+    assert tr.stdout.strip() == "[]"
+
+
+def test_import_time():
+    tr = run_python("import gkjh")
+
+    # -X importtime lines are "import time: self | cumulative | module"
+    times = {
+        line.split("|")[2].strip(): int(line.split("|")[1])
+        for line in tr.stderr.splitlines()
+        if line.startswith("import time:") and "cumulative" not in line
+    }
+
+    assert times["gkjh"] < 300000  # microseconds
+
+
+def test_lazy_attributes():
+    assert gkjh.subs is gkjh.misc.subs
+    assert gkjh.lambdas.subs is not None
+    assert "subs_vals" in dir(gkjh)
+    with pytest.raises(AttributeError):
+        gkjh.does_not_exist
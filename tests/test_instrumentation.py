@@ -0,0 +1,69 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import sympy as sp
+import sympy.physics.units as units
+
+import gkjh
+import gkjh.lambdas
+from gkjh.instrumentation import (
+    active_instrumentation,
+    disable_instrumentation,
+    enable_instrumentation,
+    expr_size,
+)
+
+
+def test_instrument():
+    a, b, c = sp.symbols("a, b, c")
+    vals = {a: 1, b: a + 1, c: 2 * b}
+
+    with gkjh.instrument() as stats:
+        assert gkjh.subs(c, vals) == 4
+        gkjh.round_expr(sp.Float(1.23456), 2)
+        gkjh.lambdas.subs(vals)(b)
+    assert active_instrumentation() is None
+
+    df = stats.summary()
+    assert df.loc["misc.subs", "calls"] == 2
+    assert df.loc["misc.subs", "iterations"] == 3 + 2
+    assert df.loc["misc.subs", "max_size"] == expr_size(c) == 1
+    assert df.loc["expr_formatting.round_expr", "calls"] == 1
+    assert df.loc["lambdas.subs", "calls"] == 1
+    assert (df["seconds"] >= 0).all()
+
+
+def test_global_switch():
+    a = sp.symbols("a")
+    stats = enable_instrumentation()
+    try:
+        gkjh.subs(a + 1, {a: 2})
+    finally:
+        disable_instrumentation()
+    gkjh.subs(a + 1, {a: 2})
+    assert stats.stats["misc.subs"]["calls"] == 1
+    assert stats.stats["misc.subs"]["max_size"] == expr_size(a + 1) == 3
+
+
+def test_instrument_recursion():
+    xs = sp.symbols("x:40")
+
+    with gkjh.instrument() as stats:
+        gkjh.strip_units(sum(x * units.meter for x in xs))
+        gkjh.misc.display(None)
+
+    assert stats.stats["misc.strip_units"]["calls"] == 1
+    assert "misc.split_units" not in stats.stats
+    assert "misc.display" not in stats.stats
@@ -25,9 +25,13 @@ from gkjh import (
     get_units,
     strip_units,
     clean_units,
+    convert_units,
     package_versions,
     put_units,
+    split_units,
+    split_units_vals,
 )
+from gkjh.misc import match_by_function
 
 
 def test_package_versions():
@@ -151,3 +155,188 @@ def test_short_assign():
     assert sp.Eq(ls(d), 33 * units.m)
     assert sp.Eq(ls(e), 0.5 * units.m)
     assert sp.Eq(ls(f), sp.Rational(2, 1000) * units.m)
+
+
+def test_subs_with_fns_of_arities():
+    a, b, c, e = sp.symbols("a, b, c, e")
+
+    d = sp.Function("d")
+
+    vals = {}
+    vals[d(a)] = a * 4
+    vals[d(a, b)] = a * b
+    vals[c] = d(3) + e
+    vals[e] = d(2, 5)
+
+    assert match_by_function(d, vals) == d(a)
+    assert match_by_function(d, vals, 2) == d(a, b)
+    assert match_by_function(sp.Function("f"), vals) is None
+    assert subs(c, vals) == 22
+
+
+def test_subs_cache():
+    a, b, c = sp.symbols("a, b, c")
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = a + 1
+
+    ls = gkjh.lambdas.subs(vals)
+
+    with gkjh.subs_cache(maxsize=2) as cache:
+        assert ls(b) == 6
+        assert ls(b) == 6
+        assert cache.info()["hits"] == 1
+
+        vals[a] = 10
+
+        assert ls(b) == 11
+        assert subs(sp.Float(2.0), vals) == 2
+        assert isinstance(subs(sp.Integer(2), vals), sp.Integer)
+        assert cache.info() == {"hits": 1, "misses": 4, "size": 2, "maxsize": 2}
+
+    assert gkjh.cache.active_subs_cache() is None
+
+    with gkjh.subs_cache():
+        # hash(-1) == hash(-2) and hash(1) == hash(1.0)
+        assert subs(a + b, {a: -1, b: 0}) == -1
+        assert subs(a + b, {a: -2, b: 0}) == -2
+        assert isinstance(subs(a, {a: 1}), sp.Integer)
+        assert isinstance(subs(a, {a: 1.0}), sp.Float)
+
+
+def test_disk_cache(tmp_path, monkeypatch):
+    a, b, x = sp.symbols("a, b, x")
+    d = sp.Function("d")
+
+    vals = {}
+    vals[a] = 5 * units.meter
+    vals[d(x)] = x * a
+    vals[b] = d(2)
+
+    expected = gkjh.subs_vals(vals)
+
+    with gkjh.disk_cache(tmp_path) as cache:
+        assert gkjh.subs_vals(vals) == expected
+        assert gkjh.subs_vals(vals) == expected
+        assert gkjh.subs_vals({a: 1}) == {a: 1}
+        assert cache.info()["hits"] == 1
+        assert cache.info()["entries"] == 2
+
+        # corrupt entries are recomputed
+        for f in tmp_path.iterdir():
+            f.write_bytes(b"not an entry")
+        assert gkjh.subs_vals(vals) == expected
+
+        monkeypatch.setattr(gkjh.cache, "DISK_CACHE_FORMAT", -1)
+        gkjh.subs_vals(vals)
+        assert cache.info()["misses"] == 4
+
+        cache.max_bytes = 0
+        gkjh.subs_vals({b: 2})
+        assert cache.info()["entries"] == 0
+
+    assert gkjh.cache.active_disk_cache() is None
+
+
+def test_subs_xreplace():
+    a, b, c, x = sp.symbols("a, b, c, x")
+
+    d = sp.Function("d")(a)
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = 4
+    vals[c] = d * 5 + b
+    vals[d] = a * 4
+
+    for key in vals:
+        assert subs(key, vals, method="xreplace") == subs(key, vals, method="subs")
+
+    unevaluated = subs(a + b, {a: 1, b: 2}, evaluate=False)
+    assert unevaluated != 3
+    assert unevaluated.doit() == 3
+
+    integral = sp.Integral(x * a, (x, 0, 1))
+    assert subs(integral, {x: 2, a: 3}) == sp.Integral(3 * x, (x, 0, 1))
+
+    f = sp.Function("f")
+    derivative = sp.Derivative(f(a), a)
+    assert subs(derivative, {a: 2}) == sp.Subs(derivative, a, 2)
+    derivative = sp.Derivative(a**2 * x, a)
+    assert subs(derivative, {a: 2}) == sp.Subs(derivative, a, 2)
+
+    with pytest.raises(ValueError):
+        subs(a, vals, method="replace")
+
+
+def test_subs_guardrails():
+    a, b, c = sp.symbols("a, b, c")
+
+    with pytest.raises(ValueError, match="a -> b -> a"):
+        subs(c, {a: b + 1, b: 2 * a, c: a})
+    with pytest.raises(ValueError, match="a -> a"):
+        subs(a, {a: a**2 + c, b * c: 1})
+    with pytest.raises(ValueError, match="30 nodes.*: a$"):
+        subs(a, {a: b + 1, b: c**2 + c, c: a + 1}, recurse=50, max_nodes=30)
+
+    # function keys that apply themselves never grow, so need the cycle check
+    x = sp.Symbol("x")
+    f = sp.Function("f")
+    with pytest.raises(ValueError, match=r"f\(x\) -> f\(x\)"):
+        subs(c, {f(x): f(x - 1) + 1, c: f(3)})
+    with pytest.raises(ValueError, match="cyclic"):
+        subs(c, {f(x): 2 * f(x - 1) + f(x - 2), c: f(3)})
+
+    # recurse still limits self-references without raising
+    assert subs(a, {a: a + 1}, recurse=2) == a + 3
+
+
+def test_split_units():
+    x = sp.Symbol("x")
+
+    assert split_units(10 * units.s / units.m) == (10, units.s / units.m)
+    assert split_units(units.m**2) == (1, units.m**2)
+    assert split_units(put_units(x + 1, units.N)) == (x + 1, units.N)
+    assert split_units(3 * units.m + 4 * x * units.m) == (4 * x + 3, units.m)
+    assert split_units(x) == (x, 1)
+
+    a, b = sp.symbols("a, b")
+
+    vals = {}
+    vals[a] = 3 * units.m
+    vals[b] = 5
+
+    assert split_units_vals(vals) == {a: (3, units.m), b: (5, 1)}
+
+
+def test_convert_units():
+    x = sp.Symbol("x")
+
+    assert convert_units(5 * units.km, units.m) == 5000 * units.m
+    assert convert_units(x * units.km, units.m) == 1000 * x * units.m
+    assert convert_units(3 * units.m + 2 * units.km, units.m) == 2003 * units.m
+    assert convert_units(2.5 * units.N, [units.kg, units.m, units.s]) == (
+        2.5 * units.kg * units.m / units.s**2
+    )
+
+
+def test_display_vals_batch(monkeypatch):
+    a, b = sp.symbols("a, b")
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = a + 1
+
+    shown = []
+    monkeypatch.setattr(gkjh.misc, "display", lambda *a, **b: shown.append(a))
+    monkeypatch.setattr(gkjh.misc, "display_latex", lambda *a, **b: shown.append(a))
+
+    gkjh.display_vals_v2(vals)
+
+    assert shown == [(sp.Eq(a, 5, evaluate=False),), (sp.Eq(b, a + 1, evaluate=False),)]
+
+    shown.clear()
+    gkjh.display_vals_v2(vals, [a, (b, gkjh.lambdas.subs(vals))], batch=True)
+
+    assert shown == [(r"$$\begin{aligned}a &= 5 \\ b &= 6\end{aligned}$$",)]
@@ -0,0 +1,116 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+import sympy as sp
+import sympy.physics.units as units
+
+from gkjh import cse_vals, lambdify_vals, subs_vals, sweep_vals
+
+
+def test_lambdify_vals():
+    a, b, c, d, e = sp.symbols("a, b, c, d, e")
+
+    f = sp.Function("f")(a)
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = 6
+    vals[c] = sp.sqrt(a + b) * sp.pi
+    vals[d] = c * 3 + f
+    vals[f] = a * 4
+
+    evaluate = lambdify_vals(vals)
+    resolved = subs_vals(vals)
+    tr = evaluate()
+
+    assert list(tr) == [a, b, c, d]
+    for k, v in tr.items():
+        assert v == pytest.approx(float(resolved[k]))
+
+    evaluate = lambdify_vals(vals, [a, e])
+
+    assert evaluate(1, 2)[d] == pytest.approx(3 * float(sp.sqrt(7) * sp.pi) + 4)
+
+
+def test_lambdify_vals_with_fn_applications():
+    a, b, c, x = sp.symbols("a, b, c, x")
+    d = sp.Function("d")
+
+    vals = {}
+    vals[a] = 2
+    vals[d(x)] = x**2
+    vals[b] = d(3) + a
+    vals[c] = d(a)
+
+    assert lambdify_vals(vals)() == {a: 2, b: 11, c: 4}
+    assert list(sweep_vals(vals, {a: [1, 2]})[c]) == [1, 4]
+
+    with pytest.raises(ValueError, match="cyclic"):
+        lambdify_vals({d(x): d(x - 1) + 1, c: d(3)})
+
+
+def test_lambdify_vals_unresolved():
+    a, b = sp.symbols("a, b")
+
+    with pytest.raises(ValueError, match="a"):
+        lambdify_vals({b: a * 2})
+    with pytest.raises(ValueError, match="meter"):
+        lambdify_vals({b: 2 * units.m})
+
+
+def test_sweep_vals():
+    a, b, c, d = sp.symbols("a, b, c, d")
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = 6
+    vals[c] = a / b
+    vals[d] = 2
+
+    df = sweep_vals(vals, {a: [1, 2, 3]})
+
+    assert list(df.columns) == [a, b, c, d]
+    assert list(df[c]) == pytest.approx([1 / 6, 2 / 6, 3 / 6])
+    assert list(df[d]) == [2, 2, 2]
+
+    df = sweep_vals(vals, {a: [1, 2, 3], b: [1, 2]}, grid=True)
+
+    assert len(df) == 6
+    assert list(df[c]) == pytest.approx([1, 1 / 2, 2, 1, 3, 3 / 2])
+
+
+def test_cse_vals():
+    a, b, c, d, x0 = sp.symbols("a, b, c, d, x0")
+
+    vals = {}
+    vals[b] = sp.sqrt(a + 1) * 2
+    vals[c] = sp.sqrt(a + 1) + b
+    vals[d] = x0
+
+    reduced = cse_vals(vals)
+    intermediates = [k for k in reduced if k not in vals]
+
+    assert len(intermediates) == 1
+    assert x0 not in intermediates
+    assert list(reduced)[1:] == [b, c, d]
+    resolved = subs_vals(reduced)
+    assert {k: resolved[k] for k in vals} == subs_vals(vals)
+    assert not any(v.has(sp.sqrt(a + 1)) for k, v in reduced.items() if k in vals)
+
+    evaluate = lambdify_vals(vals, [a, x0], cse=True)
+
+    assert evaluate(3, 1) == pytest.approx(lambdify_vals(vals, [a, x0])(3, 1))
@@ -0,0 +1,59 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+
+import sympy as sp
+import sympy.physics.units as units
+
+from gkjh import subs_vals, sweep_vals
+from gkjh.parallel import pack, unpack
+
+
+def test_pack():
+    a = sp.Symbol("a", positive=True)
+    d = sp.Function("d")(a)
+
+    for value in [5, "a", d * 3 + units.m / units.s, sp.Float(0.1) * sp.pi]:
+        assert unpack(pack(value)) == value
+
+
+def test_subs_vals_processes():
+    a, b, c, e = sp.symbols("a, b, c, e")
+
+    d = sp.Function("d")(a)
+
+    vals = {}
+    vals[b] = 4 * units.m
+    vals[c] = d * 5
+    vals[d] = a * 4 + b
+    vals[e] = d.subs(a, 3) + b
+
+    assert subs_vals(vals, processes=2) == subs_vals(vals)
+
+
+def test_sweep_vals_processes():
+    a, b, c = sp.symbols("a, b, c")
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = 6
+    vals[c] = sp.sqrt(a) / b
+
+    sweeps = {a: np.linspace(0, 10, 101), b: [1, 2, 3]}
+
+    assert sweep_vals(vals, sweeps, grid=True, processes=2).equals(
+        sweep_vals(vals, sweeps, grid=True)
+    )
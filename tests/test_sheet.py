@@ -0,0 +1,121 @@
+# Copyright (C) 2024 Gary Kim <gary@garykim.dev>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import math
+
+import pytest
+
+import numpy as np
+import sympy as sp
+import sympy.physics.units as units
+
+import gkjh
+from gkjh import Sheet, SolvedSheet, subs, subs_vals
+
+
+def test_solved_sheet():
+    a, b, c, d = sp.symbols("a, b, c, d")
+
+    vals = {}
+    vals[a] = 5
+    vals[b] = 6
+    vals[c] = a + b
+    vals[d] = c * 3
+
+    sheet = SolvedSheet(vals)
+
+    assert sheet.resolved() == subs_vals(vals)
+    assert sheet.definition(c) == a + b
+    assert sheet.dependents(b) == [b, c, d]
+
+    sheet[b] = 10
+
+    assert sheet[c] == 15
+    assert sheet[d] == 45
+
+    del sheet[a]
+
+    assert sp.Eq(sheet[d], 3 * a + 30, evaluate=True)
+
+    with pytest.raises(ValueError):
+        sheet[a] = d
+
+    assert a not in sheet
+
+    sheet[a] = 1
+
+    assert sheet[d] == 33
+    assert sheet.resolved() == subs_vals(dict(sheet.vals))
+
+
+def test_sheet(monkeypatch):
+    a, b, c, x = sp.symbols("a, b, c, x")
+    f = sp.Function("f")
+
+    vals = {}
+    vals[a] = 2 * units.meter
+    vals[f(x)] = x * 3
+    vals[b] = f(a)
+    vals[c] = b + x
+
+    sheet = Sheet(vals)
+
+    assert dict(sheet) == vals
+    assert sheet.index(b) == 2
+    assert sheet.resolved() == subs_vals(vals)
+    assert subs_vals(sheet) == subs_vals(vals)
+    assert subs(c, sheet) == subs(c, vals)
+    assert gkjh.lambdas.subs(sheet)(b) == 6 * units.meter
+    assert sheet.number(b) == 6
+    assert sheet.unit(b) == units.meter
+    assert math.isnan(sheet.number(c))
+    assert np.isnan(sheet.numbers()).tolist() == [False, True, False, True]
+
+    with gkjh.subs_cache() as cache:
+        subs(b, sheet)
+        subs(b, sheet)
+        sheet[a] = 5
+        assert subs(b, sheet) == 15
+        assert cache.info()["hits"] == 1
+
+    assert sheet.numbers()[0] == 5
+    assert sheet.unit(a) == 1
+
+    del sheet[f(x)]
+
+    assert sheet.index(c) == 2
+    assert sheet.definition(b) == f(a)
+    assert list(sheet) == [a, b, c]
+
+    shown = []
+    monkeypatch.setattr(gkjh.misc, "display", lambda *a, **b: shown.append(a))
+    gkjh.display_vals_v2(sheet, [a])
+    assert shown == [(sp.Eq(a, 5, evaluate=False),)]
+
+    # each change only resolves the keys depending on it again
+    sheet = Sheet({a: 1, b: a * 2, c: b + 1, x: 7})
+    resolved = []
+    resolve = SolvedSheet._resolve
+    monkeypatch.setattr(
+        SolvedSheet,
+        "_resolve",
+        lambda self, keys: resolve(self, resolved.extend(keys) or keys),
+    )
+    sheet[c] = b + 2
+    sheet[f(x)] = x
+    assert resolved == [c, f(x)]
+    fresh = Sheet(sheet.to_dict())
+    assert np.array_equal(sheet.numbers(), fresh.numbers(), equal_nan=True)
+    assert sheet.units() == fresh.units()